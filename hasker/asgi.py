@@ -0,0 +1,21 @@
+"""
+ASGI config for hasker project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Views are sync, Django runs them in thread pool, so slow queries hold a thread,
+not a whole worker process. Static files are served the same way as by
+hasker.wsgi, see hasker_app.static_assets. Run with e.g. ``uvicorn hasker.asgi:application``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hasker.settings")
+
+application = get_asgi_application()
+
+from hasker_app.static_assets import StaticAssetsAsgiApplication  # noqa: E402 (needs configured Django)
+
+application = StaticAssetsAsgiApplication(application)
@@ -12,6 +12,11 @@ https://docs.djangoproject.com/en/1.11/ref/settings/
 
 import os
 
+try:
+    import memcache
+except ImportError:
+    memcache = None
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -42,11 +47,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hasker_app.instrumentation.InstrumentationMiddleware',
+    'hasker_app.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hasker_app.user_cache.UserProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -82,10 +90,119 @@ DATABASES = {
         'USER': 'lesson7user',
         'PASSWORD': 'otuslesson7',
         'HOST': 'localhost',
-        'PORT': ''
+        'PORT': '',
+        # connections of request and query threads are reused instead of opened per request
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Aliases of read-only replicas of default in DATABASES, e.g.
+# DATABASES['replica_1'] = dict(DATABASES['default'], HOST='replica-1', TEST={'MIRROR': 'default'}).
+# Read-only views (see hasker_app.db_router.replica_reads) read from random replica,
+# client which wrote something reads from primary for REPLICA_STICKY_SECONDS, so do pages
+# rendered for page cache and ETags in that time after the change (should exceed replica lag)
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['hasker_app.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'hasker_cache',
+    },
+    # template fragments of question rows and answers, keys contain everything shown,
+    # so in-process cache is enough and costs no round-trips
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hasker_fragments',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # sessions, users and profiles of them (see hasker_app.user_cache); logout and changes
+    # of users are invalidated here, so it must be shared by all server processes, never
+    # in-process (LocMemCache): memcached. Without python-memcached (development) it's
+    # database cache, shared as well, but every lookup of it is a query
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+        'KEY_PREFIX': 'hasker',
+    } if memcache is not None else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'hasker_sessions_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Sessions are written to database and cache, read from cache with database fallback
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Users of sessions and their profiles are cached for USER_CACHE_TTL seconds,
+# changes of them are invalidated at once
+AUTHENTICATION_BACKENDS = ['hasker_app.user_cache.CachedModelBackend']
+USER_CACHE_TTL = 300
+
+# Top questions side panel: served from cache for SIDE_PANEL_TTL seconds,
+# after that stale value is served up to SIDE_PANEL_STALE_TTL seconds while refreshing
+SIDE_PANEL_TTL = 60
+SIDE_PANEL_STALE_TTL = 600
+SIDE_PANEL_BACKGROUND_REFRESH = True
+
+# Pages for anonymous users are cached for PAGE_CACHE_TTL seconds (0 - disabled),
+# they are invalidated earlier by question and global version counters
+PAGE_CACHE_TTL = 300
+
+# Answers on question page and in every later page loaded on scroll
+ANSWERS_PER_PAGE = 30
+
+# Number of newest questions in RSS, Atom and JSON feeds
+FEED_SIZE = 30
+
+# Total number of questions in lists is cached for QUESTION_COUNT_TTL seconds
+QUESTION_COUNT_TTL = 60
+
+# Tag autocomplete index: load new tags every TAG_INDEX_SYNC_INTERVAL seconds,
+# reload usage counters every TAG_INDEX_REBUILD_INTERVAL seconds
+TAG_INDEX_SYNC_INTERVAL = 30
+TAG_INDEX_REBUILD_INTERVAL = 600
+
+# Threads of process for independent queries of one page (side panel, page rows, votes), shared by
+# request threads; each has its own database connection. 0 runs them in request thread
+CONCURRENT_QUERY_WORKERS = 4
+
+# Per-request query count and timings (see hasker_app.instrumentation): sent in
+# Server-Timing header if SERVER_TIMING, requests over thresholds are logged with SQL
+SERVER_TIMING = DEBUG
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_QUERIES = 50
+
+# Avatar thumbnails are made by THUMBNAIL_WORKERS processes (in request if THUMBNAIL_BACKGROUND is off)
+THUMBNAIL_BACKGROUND = True
+THUMBNAIL_WORKERS = 2
+
+# Dotted path to full-text search backend (hasker_app.search), None - chosen by database vendor
+SEARCH_BACKEND = None
+
+# Deferred work (hasker_app.tasks) is done by `manage.py run_tasks` in batches of TASK_BATCH_SIZE,
+# failed tasks are retried after TASK_RETRY_DELAY * 2 ** (attempts - 1) seconds up to TASK_MAX_ATTEMPTS times
+TASK_BATCH_SIZE = 100
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 30
+TASK_POLL_SECONDS = 1
+
+# New answer notifications are sent by task worker, links in them start with SITE_URL
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'hasker@localhost'
+SITE_URL = 'http://localhost:8000'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -127,3 +244,8 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# collectstatic fingerprints and precompresses files, they are served by
+# StaticAssetsApplication (hasker/wsgi.py) from memory, larger than STATIC_MEMORY_LIMIT from mmap
+STATICFILES_STORAGE = 'hasker_app.static_assets.CompressedManifestStorage'
+STATIC_MEMORY_LIMIT = 256 * 1024
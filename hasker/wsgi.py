@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hasker.settings")
 
 application = get_wsgi_application()
+
+from hasker_app.static_assets import StaticAssetsApplication  # noqa: E402 (needs configured Django)
+
+application = StaticAssetsApplication(application)
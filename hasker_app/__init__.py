@@ -0,0 +1 @@
+default_app_config = 'hasker_app.apps.HaskerAppConfig'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Question, UserReq, Answer, Tag, UserRate
+from .models import Question, UserReq, Answer, Tag, UserRate, Task
 
 # Register your models here.
 
@@ -7,4 +7,5 @@ admin.site.register(Question)
 admin.site.register(UserReq)
 admin.site.register(Answer)
 admin.site.register(Tag)
-admin.site.register(UserRate)
\ No newline at end of file
+admin.site.register(UserRate)
+admin.site.register(Task)
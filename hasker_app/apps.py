@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class HaskerAppConfig(AppConfig):
     name = 'hasker_app'
+
+    def ready(self):
+        from hasker_app import signals  # noqa: F401
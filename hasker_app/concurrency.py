@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from hasker_app import db_router, instrumentation
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Thread pool of process, shared by request threads: number of worker threads and
+    their database connections is CONCURRENT_QUERY_WORKERS however many threads serve requests
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CONCURRENT_QUERY_WORKERS', 4),
+                thread_name_prefix='hasker-query'
+            )
+    return _executor
+
+
+def _run_in_worker(func, metrics, routing):
+    close_old_connections()
+    try:
+        # queries are counted into metrics of request which started the task and go to its database
+        with instrumentation.recording(metrics) if metrics is not None else nullcontext(), \
+                db_router.routing(routing):
+            return func()
+    finally:
+        # as after request: connection is closed unless CONN_MAX_AGE keeps it
+        close_old_connections()
+
+
+def run_concurrently(tasks):
+    """Run independent callables (mostly queries) of {name: callable} at once, returns
+    {name: result}: the first one in current thread, others in thread pool of process.
+    Exception of any task is raised.
+
+    Tasks run one by one in current thread if CONCURRENT_QUERY_WORKERS is 0, or
+    inside transaction: other connections wouldn't see its uncommitted changes.
+    """
+    if not getattr(settings, 'CONCURRENT_QUERY_WORKERS', 4) or connection.in_atomic_block or len(tasks) < 2:
+        return {name: func() for name, func in tasks.items()}
+    metrics = instrumentation.current()
+    routing = db_router.current()
+    (first_name, first), *others = tasks.items()
+    futures = {
+        name: _get_executor().submit(_run_in_worker, func, metrics, routing)
+        for name, func in others
+    }
+    try:
+        results = {first_name: first()}
+    finally:
+        # workers record into metrics of this request, it can't end before them
+        wait(futures.values())
+    results.update((name, future.result()) for name, future in futures.items())
+    return {name: results[name] for name in tasks}
@@ -0,0 +1,122 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# cookie of client which wrote to primary recently, its reads don't go to replicas
+STICKY_COOKIE = 'hasker_primary'
+# models of these apps are replicated; sessions and cache entries are always read from primary
+REPLICATED_APPS = {'hasker_app', 'auth'}
+
+_local = threading.local()
+
+
+def replica_reads(view):
+    """Mark read-only function view: its queries may go to one of DATABASE_REPLICAS
+    (class views set replica_reads attribute)
+    """
+    view.replica_reads = True
+    return view
+
+
+def reads_from_replica(view):
+    if getattr(view, 'replica_reads', False):
+        return True
+    return getattr(getattr(view, 'view_class', None), 'replica_reads', False)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+class RoutingState:
+    """Database of reads of one request and whether the request wrote to primary"""
+
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.read_db = None
+        self.wrote = False
+
+
+def current():
+    return getattr(_local, 'state', None)
+
+
+def read_from_primary():
+    """Send the remaining reads of current request to primary"""
+    state = current()
+    if state is not None:
+        state.read_db = None
+
+
+@contextmanager
+def routing(state):
+    """Route queries of current thread by state (used by run_concurrently workers too)"""
+    previous = current()
+    _local.state = state
+    try:
+        yield state
+    finally:
+        _local.state = previous
+
+
+class ReplicaRouter:
+    """Reads of replica_reads views go to random replica, everything else to primary.
+
+    After a write client keeps reading from primary for REPLICA_STICKY_SECONDS
+    (see ReplicaRoutingMiddleware), so it sees own vote or answer at once.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current()
+        if state is None or state.read_db is None:
+            return None
+        if state.wrote or model._meta.app_label not in REPLICATED_APPS:
+            return DEFAULT_DB_ALIAS
+        return state.read_db
+
+    def db_for_write(self, model, **hints):
+        # outside of requests (management commands) Django decides as without router
+        state = current()
+        if state is None:
+            return None
+        if model._meta.app_label in REPLICATED_APPS:
+            state.wrote = True
+        # objects read from replica are saved to primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas have the same rows as primary
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Chooses replica for requests of replica_reads views and sets STICKY_COOKIE
+    on responses of requests which wrote replicated models.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routing(RoutingState(sticky=STICKY_COOKIE in request.COOKIES)) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 10),
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = current()
+        replicas = get_replicas()
+        if replicas and not state.sticky and reads_from_replica(view_func):
+            state.read_db = random.choice(replicas)
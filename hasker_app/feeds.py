@@ -0,0 +1,152 @@
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import Http404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed, SyndicationFeed, rfc3339_date
+from django.views.decorators.http import condition
+
+from hasker_app.db_router import replica_reads
+from hasker_app.instrumentation import query_budget
+from hasker_app.models import Question, Tag
+from hasker_app.page_cache import cache_anonymous_page
+from hasker_app.views import QuestionDateOrderedListView
+
+
+class JsonFeed(SyndicationFeed):
+    """JSON Feed 1.1 (https://jsonfeed.org/version/1.1)"""
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def write(self, outfile, encoding):
+        feed = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+            'items': [
+                {
+                    'id': item['unique_id'] or item['link'],
+                    'url': item['link'],
+                    'title': item['title'],
+                    'content_text': item['description'],
+                    'date_published': rfc3339_date(item['pubdate']),
+                    'authors': [{'name': item['author_name']}] if item['author_name'] else [],
+                    'tags': list(item['categories'] or ()),
+                }
+                for item in self.items
+            ],
+        }
+        outfile.write(json.dumps(feed, ensure_ascii=False).encode(encoding))
+
+
+class QuestionFeed(Feed):
+    """Newest questions, all or of one tag, in order of /last"""
+    feed_type = Rss201rev2Feed
+
+    def get_object(self, request, tag=None):
+        return Tag.normalize_name(tag) if tag is not None else None
+
+    def title(self, tag):
+        return f'Hasker: newest questions tagged {tag}' if tag else 'Hasker: newest questions'
+
+    def link(self, tag):
+        if tag:
+            return reverse('question_search') + '?' + urlencode({'search_tag': tag})
+        return reverse('question_list_date_ordered')
+
+    def description(self, tag):
+        return self.title(tag)
+
+    def items(self, tag):
+        return feed_questions(tag)[:getattr(settings, 'FEED_SIZE', 30)]
+
+    def item_title(self, item):
+        return item.label
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('question_detail', args=[item.id])
+
+    def item_pubdate(self, item):
+        return item.created_date
+
+    def item_author_name(self, item):
+        return item.user.user.username if item.user else None
+
+    def item_categories(self, item):
+        return [x.name for x in item.tags.all()]
+
+
+class AtomQuestionFeed(QuestionFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, tag):
+        return self.description(tag)
+
+
+class JsonQuestionFeed(QuestionFeed):
+    feed_type = JsonFeed
+
+
+FEEDS = {
+    'rss': QuestionFeed(),
+    'atom': AtomQuestionFeed(),
+    'json': JsonQuestionFeed(),
+}
+
+
+def feed_questions(tag=None):
+    questions = (
+        Question
+        .objects
+        .select_related('user__user')
+        .prefetch_related('tags')
+        .order_by(*QuestionDateOrderedListView.ordering)
+    )
+    if tag:
+        questions = questions.filter(tags__name=tag)
+    return questions
+
+
+def _newest_question(request, feed_format, tag=None):
+    # etag and last_modified of one request share this query
+    if not hasattr(request, '_newest_question'):
+        request._newest_question = (
+            feed_questions(Tag.normalize_name(tag) if tag is not None else None)
+            .values_list('created_date', 'id')
+            .first()
+        )
+    return request._newest_question
+
+
+def feed_etag(request, feed_format, tag=None):
+    newest = _newest_question(request, feed_format, tag)
+    if newest is None:
+        return None
+    created_date, question_id = newest
+    return hashlib.md5(f'{feed_format}:{tag}:{created_date.isoformat()}:{question_id}'.encode()).hexdigest()
+
+
+def feed_last_modified(request, feed_format, tag=None):
+    newest = _newest_question(request, feed_format, tag)
+    return newest[0] if newest is not None else None
+
+
+# newest question, questions, tags (page cache is skipped for users)
+@replica_reads
+@query_budget(3, cold=16)
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
+@cache_anonymous_page
+def question_feed(request, feed_format, tag=None):
+    """Feed of FEEDS format. Conditional GET is answered by 304 after one query
+    of newest question, the rest goes through anonymous page cache.
+    """
+    if feed_format not in FEEDS:
+        raise Http404(f'Unknown feed format {feed_format}')
+    return FEEDS[feed_format](request, tag=tag)
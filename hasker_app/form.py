@@ -5,6 +5,7 @@ from django.forms import ModelForm, ImageField, Form, EmailField, widgets, Model
 from django.forms.widgets import Input
 
 from hasker_app.models import Answer, Question, Tag
+from hasker_app.tag_index import tag_index
 
 
 class MultipleChoiceTagWithAddField(ModelMultipleChoiceField):
@@ -15,17 +16,26 @@ class MultipleChoiceTagWithAddField(ModelMultipleChoiceField):
             value_list = []
         else:
             value_list = str.split(value, ',')
-        if len(value_list) > 3:
+        names = list(dict.fromkeys(x for x in map(Tag.normalize_name, value_list) if x))
+        if len(names) > 3:
             raise ValidationError('Maximum 3 tags!')
-        tags = Tag.objects.filter(name__in=value_list).all()
-        real_value = [x.id for x in tags]
-        for newtag in value_list:
-            if all(x.name != newtag for x in tags):
-                tag = Tag(name=newtag)
-                tag.save()
-                real_value.append(tag.id)
-        self.queryset = Tag.objects.all()
-        return super().clean(real_value)
+        if self.required and not names:
+            raise ValidationError(self.error_messages['required'], code='required')
+        return self.resolve_tags(names)
+
+    @staticmethod
+    def resolve_tags(names):
+        """Existing and new tags by normalized names, new ones are created with one INSERT"""
+        tags = list(Tag.objects.filter(name__in=names))
+        missing = set(names) - {x.name for x in tags}
+        if missing:
+            # concurrent request may insert the same tag, unique index keeps only one
+            Tag.objects.bulk_create([Tag(name=x) for x in missing], ignore_conflicts=True)
+            created = list(Tag.objects.filter(name__in=missing))
+            for tag in created:
+                tag_index.add(tag.id, tag.name)
+            tags += created
+        return tags
 
 
 class AnswerForm(ModelForm):
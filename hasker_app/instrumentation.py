@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# SQL of queries over this number is not kept, they are only counted
+MAX_RECORDED_QUERIES = 200
+
+_local = threading.local()
+
+
+def query_budget(count, cold=None):
+    """Declare max number of SQL queries of function view with warm caches, and with empty
+    caches if it's more (class views set query_budget and cold_query_budget attributes).
+
+    Requests over cold budget are logged by InstrumentationMiddleware, both budgets
+    are checked by QueryBudgetMixin.assertWithinBudget in tests.
+    """
+    def decorator(view):
+        view.query_budget = count
+        view.cold_query_budget = cold
+        return view
+
+    return decorator
+
+
+def _view_attribute(view, name):
+    value = getattr(view, name, None)
+    if value is None and hasattr(view, 'view_class'):
+        value = getattr(view.view_class, name, None)
+    return value
+
+
+def get_query_budget(view, cold=False):
+    budget = _view_attribute(view, 'query_budget')
+    if cold:
+        return _view_attribute(view, 'cold_query_budget') or budget
+    return budget
+
+
+class RequestMetrics:
+    """SQL queries and timings of one request, queries of worker threads included"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.query_count = 0
+        self.queries = []
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.view_time = None
+        self.total_time = None
+        self.view_name = None
+        self.query_budget = None
+        self.cold_query_budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                self.query_count += 1
+                self.db_time += duration
+                if len(self.queries) < MAX_RECORDED_QUERIES:
+                    self.queries.append((sql, duration))
+
+    @property
+    def over_budget(self):
+        # requests filling caches make more queries, only ones over cold budget are unexpected
+        return self.cold_query_budget is not None and self.query_count > self.cold_query_budget
+
+    def server_timing(self):
+        metrics = [
+            f'db;desc="{self.query_count} queries";dur={self.db_time * 1000:.1f}',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+        ]
+        if self.view_time is not None:
+            metrics.append(f'view;dur={self.view_time * 1000:.1f}')
+        metrics.append(f'total;dur={self.total_time * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def current():
+    """Metrics of request handled by current thread (or run_concurrently task of it)"""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def recording(metrics):
+    """Count queries of all database connections of current thread into metrics"""
+    previous = current()
+    _local.metrics = metrics
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _local.metrics = previous
+
+
+class InstrumentationMiddleware:
+    """Records query count, DB, template and view time of every request.
+
+    Timings are sent in Server-Timing header (if SERVER_TIMING is on), requests
+    slower than SLOW_REQUEST_MS, with more than SLOW_REQUEST_QUERIES queries or
+    over cold query budget of view are logged, with their SQL at DEBUG level.
+    Template time is known for TemplateResponse only, templates rendered by view
+    itself are view time.
+    Should be first in MIDDLEWARE, so it wraps everything.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        started = time.perf_counter()
+        with recording(metrics):
+            response = self.get_response(request)
+        metrics.total_time = time.perf_counter() - started
+        if metrics.view_time is None and getattr(request, '_view_started', None) is not None:
+            metrics.view_time = time.perf_counter() - request._view_started
+        response.metrics = metrics
+        if getattr(settings, 'SERVER_TIMING', False):
+            response['Server-Timing'] = metrics.server_timing()
+        self._log_slow(request, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+        request.metrics.view_name = getattr(request.resolver_match, 'view_name', None)
+        request.metrics.query_budget = get_query_budget(view_func)
+        request.metrics.cold_query_budget = get_query_budget(view_func, cold=True)
+
+    def process_template_response(self, request, response):
+        # called right after view returned, and as the last of middlewares
+        rendered = time.perf_counter()
+        if getattr(request, '_view_started', None) is not None:
+            request.metrics.view_time = rendered - request._view_started
+        response.render()
+        request.metrics.template_time = time.perf_counter() - rendered
+        return response
+
+    @staticmethod
+    def _log_slow(request, metrics):
+        slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        max_queries = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+        if not (
+            metrics.total_time * 1000 > slow_ms or
+            metrics.query_count > max_queries or
+            metrics.over_budget
+        ):
+            return
+        summary = (
+            f'{request.method} {request.get_full_path()} ({metrics.view_name}): {metrics.query_count} queries '
+            f'(budget {metrics.query_budget}, cold {metrics.cold_query_budget}), {metrics.server_timing()}'
+        )
+        logger.warning(summary)
+        if logger.isEnabledFor(logging.DEBUG):
+            lines = [summary] + [f'  {duration * 1000:.1f} ms: {sql}' for sql, duration in metrics.queries]
+            if metrics.query_count > len(metrics.queries):
+                lines.append(f'  ... {metrics.query_count - len(metrics.queries)} more')
+            logger.debug('\n'.join(lines))
@@ -0,0 +1,110 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+
+def _summary(name, durations, statuses, elapsed):
+    durations = sorted(durations)
+    errors = sum(1 for status in statuses if status >= 400)
+    return (
+        f'{name}: {len(durations) / elapsed:.1f} req/s, '
+        f'p50 {statistics.median(durations) * 1000:.1f} ms, '
+        f'p95 {durations[int(len(durations) * 0.95) - 1] * 1000:.1f} ms, '
+        f'errors {errors}'
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of WSGI and ASGI handlers on configured database: '
+        'requests are made in process, without network and server. Anonymous pages '
+        'are served from page cache, set PAGE_CACHE_TTL = 0 to measure views'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/', '/last'])
+        parser.add_argument('--requests', type=int, default=200, help='Requests per handler')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        paths = options['paths']
+        targets = [paths[i % len(paths)] for i in range(options['requests'])]
+        for name, run in (('wsgi', self._run_wsgi), ('asgi', self._run_asgi)):
+            started = time.perf_counter()
+            results = run(targets, options['concurrency'], options['host'])
+            elapsed = time.perf_counter() - started
+            durations = [duration for duration, _ in results]
+            statuses = [status for _, status in results]
+            self.stdout.write(_summary(name, durations, statuses, elapsed))
+
+    @staticmethod
+    def _run_wsgi(targets, concurrency, host):
+        handler = WSGIHandler()
+
+        def request(target):
+            path, _, query = target.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SERVER_NAME': host,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': host,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            status = []
+            started = time.perf_counter()
+            response = handler(environ, lambda code, headers: status.append(int(code.split()[0])))
+            b''.join(response)
+            response.close()
+            return time.perf_counter() - started, status[0]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(request, targets))
+
+    @staticmethod
+    def _run_asgi(targets, concurrency, host):
+        handler = ASGIHandler()
+
+        async def request(target, semaphore):
+            path, _, query = target.partition('?')
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'root_path': '',
+                'query_string': query.encode(),
+                'headers': [(b'host', host.encode())],
+                'server': (host, 80),
+                'client': ('127.0.0.1', 0),
+            }
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                return time.perf_counter() - started, status[0]
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(request(target, semaphore) for target in targets))
+
+        return asyncio.run(run_all())
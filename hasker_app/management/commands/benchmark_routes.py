@@ -0,0 +1,292 @@
+import json
+import math
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hasker_app.models import Answer, Question, Tag
+
+FORMAT_VERSION = 1
+
+Route = namedtuple('Route', ['label', 'name', 'method', 'kwargs', 'query', 'data', 'login'])
+
+
+def _route(name, method='GET', kwargs=None, query=None, data=None, login=False, label=None):
+    return Route(label or name, name, method, kwargs, query, data, login)
+
+
+# every url of hasker_app/urls.py with parameters taken from Sample
+ROUTES = [
+    _route('question_list'),
+    _route('question_list_date_ordered'),
+    _route('question_search', query=lambda s: {'search_tag': s.tag}, label='question_search_tag'),
+    _route('question_search', query=lambda s: {'search_str': s.word}, label='question_search_text'),
+    _route('question_detail', kwargs=lambda s: {'pk': s.question_id}),
+    _route('question_detail', kwargs=lambda s: {'pk': s.question_id}, login=True, label='question_detail_user'),
+    _route('question_answers', kwargs=lambda s: {'pk': s.question_id}),
+    _route('vote_up', kwargs=lambda s: {'obj_type': 'answer', 'obj_id': s.answer_id}, login=True),
+    _route('vote_down', kwargs=lambda s: {'obj_type': 'answer', 'obj_id': s.answer_id}, login=True),
+    _route(
+        'vote_json', 'POST',
+        kwargs=lambda s: {'obj_type': 'question', 'obj_id': s.question_id},
+        data=lambda s: {'direction': 'up'},
+        login=True
+    ),
+    _route(
+        'post_answer', 'POST',
+        kwargs=lambda s: {'question_id': s.question_id},
+        data=lambda s: {'text': 'benchmark answer'},
+        login=True
+    ),
+    _route('ask_question', login=True),
+    _route('tag_list'),
+    _route('tag_autocomplete', query=lambda s: {'q': s.tag[:2]}),
+    _route('user_profile', kwargs=lambda s: {'username': s.username}),
+    _route('question_feed', kwargs=lambda s: {'feed_format': 'rss'}, label='question_feed_rss'),
+    _route('question_feed', kwargs=lambda s: {'feed_format': 'json'}, label='question_feed_json'),
+    _route('tag_question_feed', kwargs=lambda s: {'tag': s.tag, 'feed_format': 'atom'}),
+    _route('logout'),
+    _route('login'),
+    _route('register'),
+    _route('edit_account', login=True),
+]
+
+Sample = namedtuple('Sample', ['question_id', 'answer_id', 'tag', 'word', 'username'])
+
+
+def load_sample():
+    """Most answered question, its answer and most used tag, so routes show real data"""
+    question = Question.objects.order_by('-answer_count', '-rating').first()
+    if question is None:
+        raise CommandError('No questions, run generate_dataset first')
+    answer = Answer.objects.filter(question=question).order_by('-rating').first()
+    if answer is None:
+        raise CommandError('No answers, run generate_dataset first')
+    tag = Tag.objects.order_by('-question_count').values_list('name', flat=True).first()
+    username = question.user.user.username if question.user else None
+    if username is None:
+        username = User.objects.order_by('id').values_list('username', flat=True).first()
+    return Sample(question.id, answer.id, tag or 'python', (question.label or 'python').split()[0], username)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summarize(durations, errors, elapsed):
+    """Latency and throughput of successful requests, errors are {status: count},
+    status None is a failed connection
+    """
+    durations = sorted(durations)
+    return {
+        'requests': len(durations) + sum(errors.values()),
+        'errors': sum(errors.values()),
+        'error_statuses': {str(status or 'connection'): count for status, count in sorted(
+            errors.items(), key=lambda x: x[0] or 0
+        )},
+        'throughput_rps': round(len(durations) / elapsed, 3) if elapsed else None,
+        'latency_ms': {
+            name: round(value * 1000, 3) if value is not None else None
+            for name, value in (
+                ('p50', percentile(durations, 50)),
+                ('p95', percentile(durations, 95)),
+                ('p99', percentile(durations, 99)),
+                ('max', durations[-1] if durations else None),
+            )
+        },
+    }
+
+
+class InProcessClient:
+    """Requests through Django test client, without server; errors of views are 500 responses"""
+
+    def __init__(self, host, user=None):
+        self.client = Client(raise_request_exception=False, HTTP_HOST=host)
+        if user is not None:
+            self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        if method == 'POST':
+            response = self.client.post(path, data or {})
+        else:
+            response = self.client.get(path)
+        return response.status_code
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Requests to running server, logs in with login form"""
+
+    def __init__(self, base_url, username=None, password=None):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect)
+        if username is not None:
+            self.request('GET', reverse('login'))
+            status = self.request('POST', reverse('login'), {'username': username, 'password': password})
+            if status != 302:
+                raise CommandError(f'Can not log in as {username}')
+
+    def _csrf_token(self):
+        return next((x.value for x in self.cookies if x.name == 'csrftoken'), '')
+
+    def request(self, method, path, data=None):
+        body = None
+        headers = {'Referer': self.base_url + path}
+        if method == 'POST':
+            data = dict(data or {}, csrfmiddlewaretoken=self._csrf_token())
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            e.read()
+            return e.code
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every route with given concurrency and print JSON with latency percentiles, '
+        'throughput and SQL queries per request. Routes are requested in process, or from '
+        'running server if --base-url is given. Queries are always counted in process, '
+        'by one request after warm-up, on configured database. Routes posting answers, questions '
+        'and votes write to that database (and to the running server\'s), so run it on a copy of data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='e.g. http://localhost:8000, in process if not given')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per route')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--routes', nargs='*', help='Labels of routes to run, all by default')
+        parser.add_argument('--username', default='gen_user_0', help='User for routes which need login')
+        parser.add_argument('--password', default='gen_password', help='Password of user, for --base-url')
+        parser.add_argument('--host', default='localhost', help='Host header of in process requests')
+        parser.add_argument('--output', help='Write JSON to file instead of stdout')
+
+    def handle(self, *args, **options):
+        routes = ROUTES
+        if options['routes']:
+            routes = [x for x in ROUTES if x.label in options['routes']]
+            unknown = set(options['routes']) - {x.label for x in routes}
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+        try:
+            self.user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['username']}, run generate_dataset first")
+        self.options = options
+        self.sample = load_sample()
+        self.local = threading.local()
+
+        queries = self._count_queries(routes)
+        result = {
+            'format': FORMAT_VERSION,
+            'target': options['base_url'] or 'in-process',
+            'concurrency': options['concurrency'],
+            'requests_per_route': options['requests'],
+            'routes': {},
+        }
+        all_durations, all_errors, total_elapsed = [], Counter(), 0.0
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for route in routes:
+                durations, errors, elapsed = self._run(executor, route)
+                summary = summarize(durations, errors, elapsed)
+                summary.update({'method': route.method, 'path': self._path(route), 'queries': queries[route.label]})
+                result['routes'][route.label] = summary
+                all_durations += durations
+                all_errors += errors
+                total_elapsed += elapsed
+                if errors:
+                    self.stderr.write(
+                        f"{route.label}: {summary['errors']} of {summary['requests']} requests failed, "
+                        f"statuses {summary['error_statuses']}"
+                    )
+        result['total'] = summarize(all_durations, all_errors, total_elapsed)
+
+        output = json.dumps(result, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def _path(self, route):
+        path = reverse(route.name, kwargs=route.kwargs(self.sample) if route.kwargs else None)
+        if route.query:
+            path += '?' + urlencode(route.query(self.sample))
+        return path
+
+    def _client(self, login):
+        # test client is not thread-safe, every thread has own clients
+        clients = getattr(self.local, 'clients', None)
+        if clients is None:
+            clients = self.local.clients = {}
+        if login not in clients:
+            if self.options['base_url']:
+                clients[login] = HttpClient(
+                    self.options['base_url'],
+                    self.options['username'] if login else None,
+                    self.options['password']
+                )
+            else:
+                clients[login] = InProcessClient(self.options['host'], self.user if login else None)
+        return clients[login]
+
+    def _request(self, route):
+        client = self._client(route.login)
+        data = route.data(self.sample) if route.data else None
+        started = time.perf_counter()
+        try:
+            status = client.request(route.method, self._path(route), data)
+        except OSError:
+            # server is not reachable
+            status = None
+        return time.perf_counter() - started, status
+
+    def _run(self, executor, route):
+        """Durations of successful requests, {status: count} of failed ones and elapsed time"""
+        started = time.perf_counter()
+        results = list(executor.map(lambda _: self._request(route), range(self.options['requests'])))
+        elapsed = time.perf_counter() - started
+        durations, errors = [], Counter()
+        for duration, status in results:
+            if status is None or status >= 400:
+                errors[status] += 1
+            else:
+                durations.append(duration)
+        return durations, errors, elapsed
+
+    @override_settings(CONCURRENT_QUERY_WORKERS=0)
+    def _count_queries(self, routes):
+        # all queries of request are made in this thread and connection
+        result = {}
+        for route in routes:
+            client = InProcessClient(self.options['host'], self.user if route.login else None)
+            data = route.data(self.sample) if route.data else None
+            client.request(route.method, self._path(route), data)
+            with CaptureQueriesContext(connection) as context:
+                client.request(route.method, self._path(route), data)
+            result[route.label] = len(context.captured_queries)
+        return result
@@ -0,0 +1,112 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hasker_app.models import Answer, Question, Tag, UserRate, UserReq
+from hasker_app.pagination import CursorEncoder
+
+# record types in dependency order, with {json key: field} of their rows;
+# ids are ids of source database, import_jsonl maps them to new ones
+RECORDS = [
+    ('user', lambda: UserReq.objects, {
+        'id': 'id',
+        'username': 'user__username',
+        'email': 'user__email',
+        'first_name': 'user__first_name',
+        'last_name': 'user__last_name',
+        'password': 'user__password',
+        'date_joined': 'user__date_joined',
+    }),
+    ('tag', lambda: Tag.objects, {
+        'id': 'id',
+        'name': 'name',
+    }),
+    ('question', lambda: Question.objects, {
+        'id': 'id',
+        'label': 'label',
+        'text': 'text',
+        'user_id': 'user_id',
+        'created_date': 'created_date',
+    }),
+    ('question_tag', lambda: Question.tags.through.objects, {
+        'id': 'id',
+        'question_id': 'question_id',
+        'tag_id': 'tag_id',
+    }),
+    ('answer', lambda: Answer.objects, {
+        'id': 'id',
+        'text': 'text',
+        'created_date': 'created_date',
+        'user_id': 'user_id',
+        'question_id': 'question_id',
+        'confirmed': 'confirmed',
+    }),
+    ('vote', lambda: UserRate.objects, {
+        'id': 'id',
+        'user_id': 'user_id',
+        'question_id': 'question_id',
+        'answer_id': 'answer_id',
+        'rate': 'rate',
+    }),
+]
+RECORD_TYPES = [name for name, _, _ in RECORDS]
+
+
+def open_jsonl(path, mode):
+    """Text file, gzipped if name ends with .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def throughput(name, rows, seconds):
+    return f'{name}: {rows} rows in {seconds:.1f} s ({rows / seconds if seconds else 0:.0f} rows/s)'
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream users, tags, questions, answers and votes as JSONL, one {"type": ...} '
+        'record per line. Rows are read with iterator(chunk_size), which is a server-side '
+        'cursor on PostgreSQL, so memory use doesn\'t depend on database size'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File name (.gz is compressed) or - for stdout')
+        parser.add_argument('--types', nargs='*', choices=RECORD_TYPES, help='Record types, all by default')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        types = options['types'] or RECORD_TYPES
+        # stdout is taken by data
+        log = self.stderr if options['output'] == '-' else self.stdout
+        encoder = CursorEncoder(ensure_ascii=False, separators=(',', ':'))
+        try:
+            output = self.stdout if options['output'] == '-' else open_jsonl(options['output'], 'w')
+        except OSError as e:
+            raise CommandError(e)
+        started = time.perf_counter()
+        total = 0
+        try:
+            for name, manager, fields in RECORDS:
+                if name not in types:
+                    continue
+                model_started = time.perf_counter()
+                rows = (
+                    manager()
+                    .order_by('id')
+                    .values_list(*fields.values())
+                    .iterator(chunk_size=options['chunk_size'])
+                )
+                count = 0
+                for row in rows:
+                    record = dict(zip(fields, row))
+                    record['type'] = name
+                    output.write(encoder.encode(record) + '\n')
+                    count += 1
+                total += count
+                log.write(throughput(name, count, time.perf_counter() - model_started))
+        finally:
+            if output is not self.stdout:
+                output.close()
+        log.write(throughput('total', total, time.perf_counter() - started))
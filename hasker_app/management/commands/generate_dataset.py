@@ -0,0 +1,204 @@
+import bisect
+import datetime
+import itertools
+import random
+from array import array
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hasker_app import page_cache, side_panel
+from hasker_app.models import Answer, Question, Tag, UserRate, UserReq
+
+WORDS = (
+    'python django postgres query index cache thread process socket async await list dict '
+    'tuple string bytes unicode json template view model form migration signal middleware '
+    'request response session cookie header server client deploy docker linux memory '
+    'performance latency benchmark test mock fixture error exception traceback import module '
+    'package version release branch merge commit regex parse encode decode file path stream '
+    'iterator generator decorator class object method function lambda closure scope'
+).split()
+
+
+class ZipfSampler:
+    """Random items where k-th item is picked with probability proportional to 1 / k ** s.
+
+    Items are shuffled first, so popularity doesn't follow creation order.
+    """
+
+    def __init__(self, items, s, rng):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.rng = rng
+        total = 0.0
+        self.cum_weights = []
+        for rank in range(1, len(self.items) + 1):
+            total += 1 / rank ** s
+            self.cum_weights.append(total)
+
+    def pick(self):
+        position = bisect.bisect_left(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+        return self.items[min(position, len(self.items) - 1)]
+
+    def pick_distinct(self, count):
+        count = min(count, len(self.items))
+        result = set()
+        while len(result) < count:
+            result.add(self.pick())
+        return result
+
+
+def _bulk_insert(model, objects, batch_size, ignore_conflicts=False):
+    """bulk_create objects in batches, returns ids of new rows (in insert order)"""
+    last_id = model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        # database splits batch further if it limits query size
+        model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+    # ids are not returned by bulk_create on every database
+    return array('q', model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True).iterator())
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk generate synthetic users, tags, questions, answers and votes. Authors, tags, '
+        'answered and voted objects are picked with Zipfian popularity. Counters and search '
+        'index are rebuilt afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=500)
+        parser.add_argument('--questions', type=int, default=10000)
+        parser.add_argument('--answers', type=int, default=30000)
+        parser.add_argument('--votes', type=int, default=100000)
+        parser.add_argument('--max-tags-per-question', type=int, default=3)
+        parser.add_argument('--zipf', type=float, default=1.1, help='Exponent of popularity distribution')
+        parser.add_argument('--days', type=int, default=365, help='Questions are spread over this many last days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--username-prefix', default='gen_user_')
+        parser.add_argument('--password', default='gen_password', help='Password of all generated users')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['questions'] < 1:
+            raise CommandError('At least one user and one question are needed')
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        user_ids = self._users()
+        self.stdout.write(f'Users: {len(user_ids)}')
+        tag_ids = self._tags()
+        self.stdout.write(f'Tags: {len(tag_ids)}')
+        users = ZipfSampler(user_ids, options['zipf'], self.rng)
+        question_ids, question_ages = self._questions(users, tag_ids)
+        self.stdout.write(f'Questions: {len(question_ids)}')
+        questions = ZipfSampler(range(len(question_ids)), options['zipf'], self.rng)
+        answer_ids = self._answers(users, questions, question_ids, question_ages)
+        self.stdout.write(f'Answers: {len(answer_ids)}')
+        votes = self._votes(users, question_ids, answer_ids)
+        self.stdout.write(f'Votes: {votes} (repeated user and object pairs skipped)')
+
+        call_command('rebuild_counters', stdout=StringIO())
+        call_command('rebuild_user_stats', stdout=StringIO())
+        call_command('rebuild_search_index', stdout=StringIO())
+        page_cache.bump()
+        cache.delete(side_panel.CACHE_KEY)
+        self.stdout.write('Counters and search index rebuilt')
+
+    def _words(self, low, high):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high)))
+
+    def _users(self):
+        prefix = self.options['username_prefix']
+        start = User.objects.filter(username__startswith=prefix).count()
+        password = make_password(self.options['password'])
+        user_ids = _bulk_insert(
+            User,
+            (
+                User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password)
+                for i in range(start, start + self.options['users'])
+            ),
+            self.batch_size
+        )
+        return _bulk_insert(UserReq, (UserReq(user_id=x) for x in user_ids), self.batch_size)
+
+    def _tags(self):
+        names = []
+        for i in range(self.options['tags']):
+            word = WORDS[i % len(WORDS)]
+            names.append(word if i < len(WORDS) else f'{word}{i // len(WORDS)}')
+        Tag.objects.bulk_create([Tag(name=x) for x in names], ignore_conflicts=True)
+        return list(Tag.objects.filter(name__in=names).values_list('id', flat=True))
+
+    def _questions(self, users, tag_ids):
+        days = self.options['days']
+        # seconds before now, sorted, so ids grow with dates like in real data
+        ages = sorted((self.rng.random() * days * 86400 for _ in range(self.options['questions'])), reverse=True)
+        question_ages = array('d', ages)
+        question_ids = _bulk_insert(
+            Question,
+            (
+                Question(
+                    label=self._words(4, 12).capitalize() + '?',
+                    text=self._words(20, 80),
+                    user_id=users.pick(),
+                    created_date=self.now - datetime.timedelta(seconds=age)
+                )
+                for age in ages
+            ),
+            self.batch_size
+        )
+        if tag_ids:
+            tags = ZipfSampler(tag_ids, self.options['zipf'], self.rng)
+            max_tags = self.options['max_tags_per_question']
+            _bulk_insert(
+                Question.tags.through,
+                (
+                    Question.tags.through(question_id=question_id, tag_id=tag_id)
+                    for question_id in question_ids
+                    for tag_id in tags.pick_distinct(self.rng.randint(1, max_tags))
+                ),
+                self.batch_size
+            )
+        return question_ids, question_ages
+
+    def _answers(self, users, questions, question_ids, question_ages):
+        def answers():
+            for _ in range(self.options['answers']):
+                position = questions.pick()
+                # answer is posted after its question
+                age = question_ages[position] * self.rng.random()
+                yield Answer(
+                    text=self._words(10, 60),
+                    question_id=question_ids[position],
+                    user_id=users.pick(),
+                    created_date=self.now - datetime.timedelta(seconds=age)
+                )
+
+        return _bulk_insert(Answer, answers(), self.batch_size)
+
+    def _votes(self, users, question_ids, answer_ids):
+        questions = ZipfSampler(question_ids, self.options['zipf'], self.rng)
+        answers = ZipfSampler(answer_ids, self.options['zipf'], self.rng) if answer_ids else None
+
+        def votes():
+            for _ in range(self.options['votes']):
+                rate = 1 if self.rng.random() < 0.8 else -1
+                if answers is not None and self.rng.random() < 0.7:
+                    yield UserRate(user_id=users.pick(), answer_id=answers.pick(), rate=rate)
+                else:
+                    yield UserRate(user_id=users.pick(), question_id=questions.pick(), rate=rate)
+
+        # repeated (user, object) pairs are skipped by unique constraints
+        return len(_bulk_insert(UserRate, votes(), self.batch_size, ignore_conflicts=True))
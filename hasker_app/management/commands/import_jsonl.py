@@ -0,0 +1,206 @@
+import json
+import time
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from hasker_app import page_cache, side_panel
+from hasker_app.management.commands.export_jsonl import RECORD_TYPES, open_jsonl, throughput
+from hasker_app.models import Answer, ImportBatch, Question, Tag, UserRate, UserReq
+
+
+def _insert(model, objects):
+    """bulk_create objects, returns their new ids"""
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objects)
+        return [x.pk for x in objects]
+    # no RETURNING: rows of the only writer are the ones after last id, in insert order
+    last_id = model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    model.objects.bulk_create(objects)
+    ids = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+    if len(ids) != len(objects):
+        raise CommandError(
+            f'Inserted {len(objects)} rows of {model._meta.db_table}, but {len(ids)} appeared after id '
+            f'{last_id}: another process writes to it, new ids are unknown without RETURNING'
+        )
+    return ids
+
+
+class Checkpoint:
+    """Committed batches of import with name given by --checkpoint: last line of input
+    and id mapping. Batch is saved (ImportBatch) in its own transaction, so resumed
+    import neither repeats nor skips any of them; they are deleted when import is complete.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.line = 0
+        self.ids = {record_type: {} for record_type in RECORD_TYPES}
+        if name:
+            for batch in ImportBatch.objects.filter(checkpoint=name).order_by('line'):
+                self.line = batch.line
+                self.ids[batch.record_type].update((int(k), v) for k, v in json.loads(batch.ids).items())
+
+    def finish(self):
+        """Import is complete, its batches are not needed to resume it"""
+        if self.name:
+            ImportBatch.objects.filter(checkpoint=self.name).delete()
+
+    def commit(self, line, record_type, ids):
+        """Called in transaction of batch"""
+        if self.name:
+            ImportBatch.objects.create(checkpoint=self.name, line=line, record_type=record_type, ids=json.dumps(ids))
+        self.line = line
+        self.ids[record_type].update(ids)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import JSONL of export_jsonl in batches of bulk_create. Ids of source database are '
+        'mapped to new ones; users and tags which already exist (by username and name) are '
+        'reused. With --checkpoint import continues after the last committed batch'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='File name (.gz is compressed)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Name of import, its committed batches are kept in database to resume it'
+        )
+
+    def handle(self, *args, **options):
+        self.checkpoint = Checkpoint(options['checkpoint'])
+        if self.checkpoint.line:
+            self.stdout.write(f'Resuming after line {self.checkpoint.line}')
+        self.counts = {name: 0 for name in RECORD_TYPES}
+        self.times = {name: 0.0 for name in RECORD_TYPES}
+        self.started = time.perf_counter()
+        batch, batch_type, line_number = [], None, 0
+        try:
+            source = open_jsonl(options['input'], 'r')
+        except OSError as e:
+            raise CommandError(e)
+        with source:
+            for line_number, line in enumerate(source, 1):
+                if line_number <= self.checkpoint.line or not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get('type') not in RECORD_TYPES:
+                    raise CommandError(f"Line {line_number}: unknown record type {record.get('type')}")
+                if batch and (record['type'] != batch_type or len(batch) >= options['batch_size']):
+                    self._flush(batch_type, batch, line_number - 1)
+                    batch = []
+                batch_type = record['type']
+                batch.append(record)
+        if batch:
+            self._flush(batch_type, batch, line_number)
+
+        call_command('rebuild_counters', stdout=StringIO())
+        call_command('rebuild_user_stats', stdout=StringIO())
+        call_command('rebuild_search_index', stdout=StringIO())
+        page_cache.bump()
+        cache.delete(side_panel.CACHE_KEY)
+        self.checkpoint.finish()
+        for name, count in self.counts.items():
+            self.stdout.write(throughput(name, count, self.times[name]))
+        total = sum(self.counts.values())
+        self.stdout.write(throughput('total', total, time.perf_counter() - self.started))
+
+    def _flush(self, record_type, records, line_number):
+        started = time.perf_counter()
+        with transaction.atomic():
+            ids = getattr(self, f'_import_{record_type}')(records)
+            self.checkpoint.commit(line_number, record_type, ids)
+        self.counts[record_type] += len(records)
+        self.times[record_type] += time.perf_counter() - started
+
+    def _map(self, record_type, old_id, record):
+        """New id of source id of record_type, record which refers to it is named in error"""
+        if old_id is None:
+            return None
+        try:
+            return self.checkpoint.ids[record_type][old_id]
+        except KeyError:
+            name = f"{record['type']} {record['id']}" if 'id' in record else json.dumps(record)
+            raise CommandError(f'{name}: unknown {record_type} id {old_id}')
+
+    def _import_user(self, records):
+        names = [x['username'] for x in records]
+        existing = dict(User.objects.filter(username__in=names).values_list('username', 'id'))
+        _insert(User, [
+            User(
+                username=x['username'],
+                email=x['email'],
+                first_name=x['first_name'],
+                last_name=x['last_name'],
+                password=x['password'],
+                date_joined=parse_datetime(x['date_joined']),
+            )
+            for x in records if x['username'] not in existing
+        ])
+        user_ids = dict(User.objects.filter(username__in=names).values_list('username', 'id'))
+        with_profile = set(UserReq.objects.filter(user_id__in=user_ids.values()).values_list('user_id', flat=True))
+        UserReq.objects.bulk_create([UserReq(user_id=x) for x in user_ids.values() if x not in with_profile])
+        profiles = dict(UserReq.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+        return {x['id']: profiles[user_ids[x['username']]] for x in records}
+
+    def _import_tag(self, records):
+        names = [Tag.normalize_name(x['name']) for x in records]
+        Tag.objects.bulk_create([Tag(name=x) for x in names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        return {x['id']: tag_ids[name] for x, name in zip(records, names)}
+
+    def _import_question(self, records):
+        new_ids = _insert(Question, [
+            Question(
+                label=x['label'],
+                text=x['text'],
+                user_id=self._map('user', x['user_id'], x),
+                created_date=parse_datetime(x['created_date']),
+            )
+            for x in records
+        ])
+        return {x['id']: new_id for x, new_id in zip(records, new_ids)}
+
+    def _import_question_tag(self, records):
+        # links are unique, repeated batch is skipped
+        Question.tags.through.objects.bulk_create([
+            Question.tags.through(
+                question_id=self._map('question', x['question_id'], x),
+                tag_id=self._map('tag', x['tag_id'], x),
+            )
+            for x in records
+        ], ignore_conflicts=True)
+        return {}
+
+    def _import_answer(self, records):
+        new_ids = _insert(Answer, [
+            Answer(
+                text=x['text'],
+                created_date=parse_datetime(x['created_date']),
+                user_id=self._map('user', x['user_id'], x),
+                question_id=self._map('question', x['question_id'], x),
+                confirmed=x['confirmed'],
+            )
+            for x in records
+        ])
+        return {x['id']: new_id for x, new_id in zip(records, new_ids)}
+
+    def _import_vote(self, records):
+        # unique constraints skip votes which already exist
+        UserRate.objects.bulk_create([
+            UserRate(
+                user_id=self._map('user', x['user_id'], x),
+                question_id=self._map('question', x['question_id'], x),
+                answer_id=self._map('answer', x['answer_id'], x),
+                rate=x['rate'],
+            )
+            for x in records
+        ], ignore_conflicts=True)
+        return {}
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from hasker_app.models import Answer, Question, Tag, UserRate
+
+
+def _rate_sum(field):
+    return Coalesce(
+        Subquery(
+            UserRate
+            .objects
+            .filter(**{field: OuterRef('pk')})
+            .values(field)
+            .annotate(total=Sum('rate'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _answer_count():
+    return Coalesce(
+        Subquery(
+            Answer
+            .objects
+            .filter(question=OuterRef('pk'))
+            .values('question')
+            .annotate(total=Count('id'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _question_count():
+    questions = Question.tags.through.objects.filter(tag=OuterRef('pk')).values('tag').annotate(total=Count('id'))
+    return Coalesce(Subquery(questions.values('total'), output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculate stored rating, answer_count and tag question_count columns '
+        'from UserRate, Answer and question tags tables'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            questions = Question.objects.update(rating=_rate_sum('question'), answer_count=_answer_count())
+            answers = Answer.objects.update(rating=_rate_sum('answer'))
+            tags = Tag.objects.update(question_count=_question_count())
+        self.stdout.write(f'Rebuilt counters for {questions} questions, {answers} answers and {tags} tags')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hasker_app import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild full-text search index of questions and answers'
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(f'Search index rebuilt with {type(backend).__name__}')
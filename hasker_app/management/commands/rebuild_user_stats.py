@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from hasker_app import user_stats
+from hasker_app.models import UserReq
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculate reputation, question, answer and accepted answer counts of users '
+        'from stored question and answer ratings (run rebuild_counters first if they are stale), '
+        'in transaction per batch of users'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        last_id, total = 0, 0
+        while True:
+            user_ids = list(
+                UserReq
+                .objects
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not user_ids:
+                break
+            user_stats.rebuild(user_ids)
+            last_id = user_ids[-1]
+            total += len(user_ids)
+        self.stdout.write(f'Rebuilt stats of {total} users')
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from hasker_app import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Run deferred tasks (hasker_app.tasks) in batches, claimed with SELECT ... FOR UPDATE SKIP LOCKED '
+        'so several workers can run at once; polls for new tasks until interrupted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'TASK_BATCH_SIZE', 100))
+        parser.add_argument('--sleep', type=float, default=getattr(settings, 'TASK_POLL_SECONDS', 1),
+                            help='seconds to wait when there are no due tasks')
+        parser.add_argument('--once', action='store_true', help='exit when there are no due tasks')
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                claimed = tasks.run_batch(options['batch_size'])
+                total += claimed
+                if claimed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                # long running worker shouldn't keep broken or expired connection
+                close_old_connections()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Processed {total} tasks')
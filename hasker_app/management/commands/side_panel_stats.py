@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from hasker_app import side_panel
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of top questions side panel cache'
+
+    def handle(self, *args, **options):
+        stats = side_panel.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(f"hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {ratio:.2%}")
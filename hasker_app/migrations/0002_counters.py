@@ -0,0 +1,56 @@
+# Generated by Django 3.0.14 on 2026-10-18 13:07
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Question = apps.get_model('hasker_app', 'Question')
+    Answer = apps.get_model('hasker_app', 'Answer')
+    UserRate = apps.get_model('hasker_app', 'UserRate')
+
+    def rate_sum(field):
+        rates = UserRate.objects.filter(**{field: OuterRef('pk')}).values(field).annotate(total=Sum('rate'))
+        return Coalesce(Subquery(rates.values('total'), output_field=IntegerField()), 0)
+
+    answers = Answer.objects.filter(question=OuterRef('pk')).values('question').annotate(total=Count('id'))
+    Question.objects.update(
+        rating=rate_sum('question'),
+        answer_count=Coalesce(Subquery(answers.values('total'), output_field=IntegerField()), 0)
+    )
+    Answer.objects.update(rating=rate_sum('answer'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='rating',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='answer_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='rating',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-rating', '-created_date'], name='hasker_app__rating_b99257_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-created_date'], name='hasker_app__created_5e5351_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE hasker_app_search ("
+            "question_id integer PRIMARY KEY REFERENCES hasker_app_question (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute("CREATE INDEX hasker_app_search_document_idx ON hasker_app_search USING gin (document)")
+        schema_editor.execute(
+            "INSERT INTO hasker_app_search (question_id, document) "
+            "SELECT q.id, "
+            "setweight(to_tsvector('english', coalesce(q.label, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(q.text, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(("
+            "SELECT string_agg(a.text, ' ') FROM hasker_app_answer a WHERE a.question_id = q.id"
+            "), '')), 'C') "
+            "FROM hasker_app_question q"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE hasker_app_search USING fts5(label, text, answers, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO hasker_app_search (rowid, label, text, answers) "
+            "SELECT q.id, coalesce(q.label, ''), coalesce(q.text, ''), coalesce(("
+            "SELECT group_concat(a.text, ' ') FROM hasker_app_answer a WHERE a.question_id = q.id"
+            "), '') FROM hasker_app_question q"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute("DROP TABLE hasker_app_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
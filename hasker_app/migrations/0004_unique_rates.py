@@ -0,0 +1,46 @@
+# Generated by Django 3.0.14 on 2026-10-18 13:18
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def merge_duplicate_rates(apps, schema_editor):
+    """Concurrent votes could create several rows for one user and object: merge them into one"""
+    UserRate = apps.get_model('hasker_app', 'UserRate')
+    for obj_type in ('question', 'answer'):
+        model = apps.get_model('hasker_app', obj_type)
+        duplicates = (
+            UserRate
+            .objects
+            .filter(**{f'{obj_type}__isnull': False})
+            .values('user', obj_type)
+            .annotate(count=Count('id'))
+            .filter(count__gt=1)
+        )
+        for duplicate in duplicates:
+            rates = list(UserRate.objects.filter(user=duplicate['user'], **{obj_type: duplicate[obj_type]}).order_by('id'))
+            total = sum(x.rate for x in rates)
+            merged = max(-1, min(1, total))
+            rates[0].rate = merged
+            rates[0].save()
+            UserRate.objects.filter(id__in=[x.id for x in rates[1:]]).delete()
+            model.objects.filter(pk=duplicate[obj_type]).update(rating=F('rating') + merged - total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userrate',
+            constraint=models.UniqueConstraint(fields=('user', 'question'), name='unique_user_question_rate'),
+        ),
+        migrations.AddConstraint(
+            model_name='userrate',
+            constraint=models.UniqueConstraint(fields=('user', 'answer'), name='unique_user_answer_rate'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.0.14 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+def normalize_tag_names(apps, schema_editor):
+    """Trim and lowercase names, questions of duplicate tags are moved to the first one"""
+    Tag = apps.get_model('hasker_app', 'Tag')
+    Question = apps.get_model('hasker_app', 'Question')
+    QuestionTag = Question.tags.through
+    canonical = {}
+    for tag in Tag.objects.order_by('id'):
+        name = tag.name.strip().lower()
+        if name not in canonical:
+            if tag.name != name:
+                tag.name = name
+                tag.save()
+            canonical[name] = tag
+            continue
+        keep = canonical[name]
+        question_ids = set(QuestionTag.objects.filter(tag_id=tag.id).values_list('question_id', flat=True))
+        question_ids -= set(QuestionTag.objects.filter(tag_id=keep.id).values_list('question_id', flat=True))
+        QuestionTag.objects.bulk_create([QuestionTag(question_id=x, tag_id=keep.id) for x in question_ids])
+        tag.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0004_unique_rates'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_tag_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.TextField(unique=True),
+        ),
+    ]
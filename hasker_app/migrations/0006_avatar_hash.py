@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0005_unique_tag_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userreq',
+            name='avatar_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
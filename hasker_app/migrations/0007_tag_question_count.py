@@ -0,0 +1,32 @@
+# Generated by Django 3.0.14 on 2026-10-18 13:38
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_question_count(apps, schema_editor):
+    Tag = apps.get_model('hasker_app', 'Tag')
+    QuestionTag = apps.get_model('hasker_app', 'Question').tags.through
+    questions = QuestionTag.objects.filter(tag_id=OuterRef('pk')).values('tag_id').annotate(total=Count('id'))
+    Tag.objects.update(question_count=Coalesce(Subquery(questions.values('total'), output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0006_avatar_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='question_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-question_count', 'name'], name='hasker_app__questio_fe46a7_idx'),
+        ),
+        migrations.RunPython(fill_question_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-18 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0007_tag_question_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', '-confirmed', '-rating', '-created_date', '-id'], name='hasker_app__questio_9c98e9_idx'),
+        ),
+    ]
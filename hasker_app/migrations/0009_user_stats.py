@@ -0,0 +1,70 @@
+# Generated by Django 3.0.14 on 2026-10-18 14:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from django.db.models import Count, Q, Sum
+
+# reputation rules when stats were introduced, hasker_app.user_stats may change later
+QUESTION_VOTE_REPUTATION = 5
+ANSWER_VOTE_REPUTATION = 10
+ACCEPTED_ANSWER_REPUTATION = 15
+
+
+def fill_user_stats(apps, schema_editor):
+    UserReq = apps.get_model('hasker_app', 'UserReq')
+    Question = apps.get_model('hasker_app', 'Question')
+    Answer = apps.get_model('hasker_app', 'Answer')
+    UserStats = apps.get_model('hasker_app', 'UserStats')
+    user_ids = list(UserReq.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(user_ids), 1000):
+        batch = user_ids[start:start + 1000]
+        questions = {
+            x['user_id']: x
+            for x in Question.objects.filter(user_id__in=batch).values('user_id').annotate(
+                total=Count('id'), rating=Sum('rating')
+            )
+        }
+        answers = {
+            x['user_id']: x
+            for x in Answer.objects.filter(user_id__in=batch).values('user_id').annotate(
+                total=Count('id'), rating=Sum('rating'), accepted=Count('id', filter=Q(confirmed=True))
+            )
+        }
+        empty = {'total': 0, 'rating': 0, 'accepted': 0}
+        rows = []
+        for user_id in batch:
+            asked, answered = questions.get(user_id, empty), answers.get(user_id, empty)
+            rows.append(UserStats(
+                user_id=user_id,
+                reputation=(
+                    (asked['rating'] or 0) * QUESTION_VOTE_REPUTATION +
+                    (answered['rating'] or 0) * ANSWER_VOTE_REPUTATION +
+                    answered['accepted'] * ACCEPTED_ANSWER_REPUTATION
+                ),
+                question_count=asked['total'],
+                answer_count=answered['total'],
+                accepted_count=answered['accepted'],
+            ))
+        UserStats.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0008_answer_page_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='hasker_app.UserReq')),
+                ('reputation', models.IntegerField(default=0)),
+                ('question_count', models.IntegerField(default=0)),
+                ('answer_count', models.IntegerField(default=0)),
+                ('accepted_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.0.14 on 2026-10-18 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hasker_app', '0010_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkpoint', models.CharField(max_length=200)),
+                ('line', models.IntegerField()),
+                ('record_type', models.CharField(max_length=20)),
+                ('ids', models.TextField(default='{}')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='importbatch',
+            index=models.Index(fields=['checkpoint', 'line'], name='hasker_app__checkpo_381f23_idx'),
+        ),
+    ]
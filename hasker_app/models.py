@@ -5,11 +5,28 @@ from django.utils import timezone
 
 class UserReq(models.Model):
     avatar = models.ImageField(default='../static/hasker_app/default_avatar.jpg')
+    # sha256 of avatar file when its thumbnails are ready, see hasker_app.thumbnails
+    avatar_hash = models.CharField(max_length=64, blank=True, default='')
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="user_req")
 
 
 class Tag(models.Model):
-    name = models.TextField()
+    name = models.TextField(unique=True)
+    # number of questions with tag, kept by signals (see hasker_app.signals) and rebuild_counters
+    question_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-question_count', 'name']),
+        ]
+
+    @staticmethod
+    def normalize_name(name):
+        return name.strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.name = self.normalize_name(self.name)
+        super().save(*args, **kwargs)
 
 
 class Question(models.Model):
@@ -18,6 +35,14 @@ class Question(models.Model):
     user = models.ForeignKey(UserReq, on_delete=models.SET_NULL, null=True)
     created_date = models.DateTimeField(default=timezone.now)
     tags = models.ManyToManyField(Tag, blank=True)
+    rating = models.IntegerField(default=0)
+    answer_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating', '-created_date']),
+            models.Index(fields=['-created_date']),
+        ]
 
 
 class Answer(models.Model):
@@ -26,6 +51,65 @@ class Answer(models.Model):
     user = models.ForeignKey(UserReq, on_delete=models.SET_NULL, null=True)
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="answers")
     confirmed = models.BooleanField(default=False)
+    rating = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # order of question page, see views.load_answers_page
+            models.Index(fields=['question', '-confirmed', '-rating', '-created_date', '-id']),
+        ]
+
+
+class UserStats(models.Model):
+    """Counters of user profile page, changed by views in transactions of votes and posts
+    (see hasker_app.user_stats) and recalculated by rebuild_user_stats
+    """
+    user = models.OneToOneField(UserReq, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    reputation = models.IntegerField(default=0)
+    question_count = models.IntegerField(default=0)
+    answer_count = models.IntegerField(default=0)
+    accepted_count = models.IntegerField(default=0)
+
+
+class Task(models.Model):
+    """Deferred work run by run_tasks command, see hasker_app.tasks"""
+    name = models.CharField(max_length=64)
+    # JSON arguments of handler
+    payload = models.TextField(default='{}')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # attempts are exhausted, task is kept for inspection
+    failed = models.BooleanField(default=False)
+    created_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # due tasks claimed by workers
+            models.Index(fields=['run_at', 'id'], name='hasker_app_task_due', condition=models.Q(failed=False)),
+        ]
+
+
+class ImportBatch(models.Model):
+    """Batch of import_jsonl, saved in its transaction: resumed import skips lines of
+    committed batches and maps source ids of their records to new ones
+    """
+    checkpoint = models.CharField(max_length=200)
+    line = models.IntegerField()
+    record_type = models.CharField(max_length=20)
+    # {source id: new id} as JSON
+    ids = models.TextField(default='{}')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['checkpoint', 'line']),
+        ]
+
+
+class Counter(models.Model):
+    """Named counter shared by all processes, incremented with F() (see side_panel)"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
 
 
 class UserRate(models.Model):
@@ -33,3 +117,9 @@ class UserRate(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="rates", null=True, blank=True)
     answer = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name="rates", null=True, blank=True)
     rate = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'question'], name='unique_user_question_rate'),
+            models.UniqueConstraint(fields=['user', 'answer'], name='unique_user_answer_rate'),
+        ]
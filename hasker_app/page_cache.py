@@ -0,0 +1,119 @@
+import functools
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from hasker_app import db_router
+
+GLOBAL_VERSION_KEY = 'hasker:version'
+QUESTION_VERSION_KEY = 'hasker:version:question:{}'
+# entries are (content, headers); version of the format is in the key
+PAGE_KEY = 'hasker:page:2:{}'
+# headers of response which are not kept with cached page
+UNCACHED_HEADERS = {'content-length', 'set-cookie', 'x-page-cache'}
+
+
+def _new_version():
+    # start time of version tells whether replicas may still lag behind it
+    return f'{time.time():.3f}-{uuid.uuid4().hex}'
+
+
+def _is_recent(version):
+    started, sep, _ = version.partition('-')
+    if not sep:
+        return False
+    try:
+        started = float(started)
+    except ValueError:
+        return False
+    return time.time() - started < getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def get_versions(keys):
+    """Current version tokens, missing (or evicted) ones are started anew.
+
+    Pages and ETags are kept under these tokens, so for REPLICA_STICKY_SECONDS after
+    a version started the rest of the request reads from primary: replica which has
+    not got the change yet would have the old page cached under the new version.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    versions = [versions[key] for key in keys]
+    if any(_is_recent(x) for x in versions):
+        db_router.read_from_primary()
+    return versions
+
+
+def bump(question_id=None, global_version=True):
+    """Make cached pages of question (and lists, if global_version) stale"""
+    keys = []
+    if global_version:
+        keys.append(GLOBAL_VERSION_KEY)
+    if question_id is not None:
+        keys.append(QUESTION_VERSION_KEY.format(question_id))
+    cache.set_many({key: _new_version() for key in keys}, None)
+
+
+def question_version(question_id):
+    return get_versions([QUESTION_VERSION_KEY.format(question_id)])[0]
+
+
+def cache_anonymous_page(view=None, question_kwarg=None, only_if=None):
+    """Cache whole response for anonymous GET requests.
+
+    Key contains full path and version: per-question version if question_kwarg is
+    given (question page), otherwise global one (lists). Page is kept with headers of
+    response, so hits are cached by clients the same way. Responses which used CSRF
+    token or set cookies are never cached.
+    """
+    if view is None:
+        return functools.partial(cache_anonymous_page, question_kwarg=question_kwarg, only_if=only_if)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        timeout = getattr(settings, 'PAGE_CACHE_TTL', 300)
+        if (
+            not timeout or
+            request.method not in ('GET', 'HEAD') or
+            request.user.is_authenticated or
+            (only_if is not None and not only_if(request))
+        ):
+            return view(request, *args, **kwargs)
+
+        if question_kwarg is not None:
+            version = question_version(kwargs[question_kwarg])
+        else:
+            version = get_versions([GLOBAL_VERSION_KEY])[0]
+        key = PAGE_KEY.format(hashlib.md5(f'{request.get_full_path()}:{version}'.encode()).hexdigest())
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            # Content-Type, Cache-Control, Vary... as the view set them
+            for name, value in headers:
+                response[name] = value
+            response['X-Page-Cache'] = 'hit'
+            return response
+
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        if (
+            response.status_code == 200 and
+            not response.streaming and
+            not response.cookies and
+            not request.META.get('CSRF_COOKIE_USED')
+        ):
+            headers = [(name, value) for name, value in response.items() if name.lower() not in UNCACHED_HEADERS]
+            cache.set(key, (response.content, headers), timeout)
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    return wrapper
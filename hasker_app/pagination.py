@@ -0,0 +1,157 @@
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import math
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def cached_count(queryset):
+    """COUNT(*) of queryset, cached for QUESTION_COUNT_TTL seconds by its SQL"""
+    key = 'hasker:count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'QUESTION_COUNT_TTL', 60))
+    return count
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts microseconds, but cursor must point to exact value
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class CursorPage:
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset pagination: page is selected by (ordering values, id) of the row next to it,
+    not by OFFSET, so every page costs the same.
+
+    Cursor is urlsafe base64 of JSON [backwards, [values]].
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        if not any(name in ('id', 'pk') for name, _ in self.fields):
+            # id makes order total, so cursor position is stable
+            self.fields.append(('id', self.fields[0][1] if self.fields else False))
+
+    @cached_property
+    def count(self):
+        return cached_count(self.queryset)
+
+    def _encode(self, obj, backwards):
+        values = [getattr(obj, name) for name, _ in self.fields]
+        data = json.dumps([backwards, values], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            backwards, values = json.loads(base64.urlsafe_b64decode((cursor + padding).encode()))
+        except (ValueError, TypeError, binascii.Error):
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        result = []
+        for (name, _), value in zip(self.fields, values):
+            # NULL would be no position at all, and crafted cursors can have anything
+            if value is None or isinstance(value, (list, dict)):
+                raise InvalidCursor(cursor)
+            try:
+                field = self.queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # annotation: numeric search rank, which skips to_python of fields
+                field = None
+            try:
+                if field is None:
+                    value = float(value)
+                    if not math.isfinite(value):
+                        raise InvalidCursor(cursor)
+                else:
+                    value = field.to_python(value)
+                    field.run_validators(value)
+                    # not every backend reports range of integer fields
+                    if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+                        raise InvalidCursor(cursor)
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor(cursor)
+            result.append(value)
+        return bool(backwards), result
+
+    def _position_filter(self, values, backwards):
+        conditions = []
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != backwards else 'gt'
+            equal = {field_name: value for (field_name, _), value in zip(self.fields[:i], values[:i])}
+            conditions.append(Q(**equal) & Q(**{f'{name}__{lookup}': values[i]}))
+        return reduce(lambda x, y: x | y, conditions)
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        backwards = False
+        if cursor:
+            backwards, values = self._decode(cursor)
+            queryset = queryset.filter(self._position_filter(values, backwards))
+        ordering = [('-' if descending != backwards else '') + name for name, descending in self.fields]
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        return CursorPage(
+            rows,
+            self,
+            self._encode(rows[-1], False) if rows and has_next else None,
+            self._encode(rows[0], True) if rows and has_previous else None,
+        )
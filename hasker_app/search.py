@@ -0,0 +1,184 @@
+import functools
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+SEARCH_TABLE = 'hasker_app_search'
+
+
+class BaseSearchBackend:
+    """Interface of question full-text search.
+
+    search() returns questions queryset filtered by query and annotated with search_rank,
+    other methods keep index up to date when questions and answers are saved.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    @staticmethod
+    def _nothing(queryset):
+        return queryset.annotate(search_rank=Value(0, output_field=FloatField())).none()
+
+    def index_question(self, question_id):
+        pass
+
+    def add_answer(self, question_id, text):
+        pass
+
+    def remove_question(self, question_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """Fallback without index: substring search in label and text"""
+
+    def search(self, queryset, query):
+        return (
+            queryset
+            .filter(Q(label__contains=query) | Q(text__contains=query))
+            .annotate(search_rank=Value(0, output_field=FloatField()))
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector document per question (label, text and answers) with GIN index"""
+    config = 'english'
+
+    def _document_sql(self):
+        return (
+            "setweight(to_tsvector(%(config)s, coalesce(q.label, '')), 'A') || "
+            "setweight(to_tsvector(%(config)s, coalesce(q.text, '')), 'B') || "
+            "setweight(to_tsvector(%(config)s, coalesce(("
+            "SELECT string_agg(a.text, ' ') FROM hasker_app_answer a WHERE a.question_id = q.id"
+            "), '')), 'C')"
+        )
+
+    def search(self, queryset, query):
+        if not query.split():
+            return self._nothing(queryset)
+        return (
+            queryset
+            .filter(id__in=RawSQL(
+                f"SELECT question_id FROM {SEARCH_TABLE} WHERE document @@ plainto_tsquery(%s, %s)",
+                [self.config, query]
+            ))
+            .annotate(search_rank=RawSQL(
+                # real rank wouldn't compare equal to its double from cursor (see CursorPaginator)
+                f"SELECT ts_rank(document, plainto_tsquery(%s, %s))::float8 FROM {SEARCH_TABLE} "
+                "WHERE question_id = hasker_app_question.id",
+                [self.config, query],
+                output_field=FloatField()
+            ))
+        )
+
+    def index_question(self, question_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (question_id, document) "
+                f"SELECT q.id, {self._document_sql()} FROM hasker_app_question q WHERE q.id = %(id)s "
+                "ON CONFLICT (question_id) DO UPDATE SET document = EXCLUDED.document",
+                {'config': self.config, 'id': question_id}
+            )
+
+    def add_answer(self, question_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {SEARCH_TABLE} SET document = document || setweight(to_tsvector(%s, %s), 'C') "
+                "WHERE question_id = %s",
+                [self.config, text, question_id]
+            )
+
+    def remove_question(self, question_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE question_id = %s", [question_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (question_id, document) "
+                f"SELECT q.id, {self._document_sql()} FROM hasker_app_question q",
+                {'config': self.config}
+            )
+
+
+class SqliteSearchBackend(BaseSearchBackend):
+    """FTS5 virtual table with rowid equal to question id"""
+    weights = (10.0, 5.0, 1.0)
+
+    @staticmethod
+    def _match_query(query):
+        # every word is quoted, so user input can't use FTS5 syntax
+        return ' '.join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+
+    def search(self, queryset, query):
+        match = self._match_query(query)
+        if not match:
+            return self._nothing(queryset)
+        weights = ', '.join(str(x) for x in self.weights)
+        return (
+            queryset
+            .filter(id__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match]))
+            .annotate(search_rank=RawSQL(
+                f"SELECT -bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = hasker_app_question.id",
+                [match],
+                output_field=FloatField()
+            ))
+        )
+
+    @staticmethod
+    def _insert_sql():
+        return (
+            f"INSERT INTO {SEARCH_TABLE} (rowid, label, text, answers) "
+            "SELECT q.id, coalesce(q.label, ''), coalesce(q.text, ''), coalesce(("
+            "SELECT group_concat(a.text, ' ') FROM hasker_app_answer a WHERE a.question_id = q.id"
+            "), '') FROM hasker_app_question q"
+        )
+
+    def index_question(self, question_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [question_id])
+            cursor.execute(self._insert_sql() + " WHERE q.id = %s", [question_id])
+
+    def add_answer(self, question_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {SEARCH_TABLE} SET answers = answers || ' ' || %s WHERE rowid = %s",
+                [text, question_id]
+            )
+
+    def remove_question(self, question_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [question_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(self._insert_sql())
+
+
+VENDOR_BACKENDS = {
+    'postgresql': 'hasker_app.search.PostgresSearchBackend',
+    'sqlite': 'hasker_app.search.SqliteSearchBackend',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    """Backend from SEARCH_BACKEND setting, by default chosen by database vendor"""
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path is None:
+        path = VENDOR_BACKENDS.get(connection.vendor, 'hasker_app.search.ContainsSearchBackend')
+    return _load_backend(path)
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import F
+
+from hasker_app.models import Counter, Question
+
+SIDE_PANEL_SIZE = 10
+CACHE_KEY = 'hasker:side_panel'
+REFRESH_LOCK_KEY = 'hasker:side_panel:refresh'
+HITS_KEY = 'hasker:side_panel:hits'
+MISSES_KEY = 'hasker:side_panel:misses'
+COUNTERS_FLUSH_SIZE = 100
+COUNTERS_FLUSH_INTERVAL = 10
+
+
+def _fresh_ttl():
+    return getattr(settings, 'SIDE_PANEL_TTL', 60)
+
+
+def _stale_ttl():
+    return getattr(settings, 'SIDE_PANEL_STALE_TTL', 600)
+
+
+_pending = {HITS_KEY: 0, MISSES_KEY: 0}
+_pending_lock = threading.Lock()
+_last_flush = time.time()
+
+
+def _flush_counters():
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending)
+        for key in _pending:
+            _pending[key] = 0
+        _last_flush = time.time()
+    # UPDATE ... SET value = value + n doesn't lose increments of other processes;
+    # explicit database keeps it out of replica routing (no sticky cookie for it)
+    counters = Counter.objects.using(DEFAULT_DB_ALIAS)
+    for key, value in pending.items():
+        if not value:
+            continue
+        counters.get_or_create(name=key)
+        counters.filter(name=key).update(value=F('value') + value)
+
+
+def _count(key):
+    # counters are kept in process and written to database in batches,
+    # so counting doesn't cost round-trips on every request
+    with _pending_lock:
+        _pending[key] += 1
+        need_flush = (
+            sum(_pending.values()) >= COUNTERS_FLUSH_SIZE or
+            time.time() - _last_flush >= COUNTERS_FLUSH_INTERVAL
+        )
+    if need_flush:
+        _flush_counters()
+
+
+def _load():
+    return list(
+        Question
+        .objects
+        .order_by('-rating', '-created_date')
+        .values('id', 'label', 'rating', 'created_date')[0:SIDE_PANEL_SIZE]
+    )
+
+
+def _store(questions):
+    entry = {'questions': questions, 'fresh_until': time.time() + _fresh_ttl()}
+    cache.set(CACHE_KEY, entry, _fresh_ttl() + _stale_ttl())
+
+
+def _refresh():
+    if not cache.add(REFRESH_LOCK_KEY, True, _fresh_ttl()):
+        # somebody is already refreshing
+        return
+
+    def run():
+        try:
+            _store(_load())
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+
+    def run_in_thread():
+        try:
+            run()
+        finally:
+            connection.close()
+
+    if getattr(settings, 'SIDE_PANEL_BACKGROUND_REFRESH', True):
+        threading.Thread(target=run_in_thread, daemon=True).start()
+    else:
+        run()
+
+
+def get_side_questions():
+    """Top questions for side panel. Stale entries are served while refreshing"""
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        _count(MISSES_KEY)
+        questions = _load()
+        _store(questions)
+        return questions
+    _count(HITS_KEY)
+    if entry['fresh_until'] < time.time():
+        _refresh()
+    return entry['questions']
+
+
+def question_changed(question_id, rating, created_date):
+    """Drop cached side panel if question with new rating can get into (or move inside) top list"""
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        return
+    questions = entry['questions']
+    if len(questions) < SIDE_PANEL_SIZE or any(x['id'] == question_id for x in questions):
+        cache.delete(CACHE_KEY)
+        return
+    last = questions[-1]
+    if (rating, created_date) > (last['rating'], last['created_date']):
+        cache.delete(CACHE_KEY)
+
+
+def stats():
+    """Hit/miss counters of all processes, including not yet flushed ones of current process"""
+    with _pending_lock:
+        pending = dict(_pending)
+    values = dict(
+        Counter.objects.using(DEFAULT_DB_ALIAS).filter(name__in=[HITS_KEY, MISSES_KEY]).values_list('name', 'value')
+    )
+    return {
+        'hits': values.get(HITS_KEY, 0) + pending[HITS_KEY],
+        'misses': values.get(MISSES_KEY, 0) + pending[MISSES_KEY],
+    }
@@ -0,0 +1,115 @@
+from collections import Counter, defaultdict
+
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+
+from hasker_app import search, user_cache, user_stats
+from hasker_app.models import Answer, Question, Tag, UserReq, UserStats
+from hasker_app.tag_index import tag_index
+
+
+@receiver(post_save, sender=Question)
+def index_question(sender, instance, **kwargs):
+    search.get_backend().index_question(instance.id)
+
+
+@receiver(post_delete, sender=Question)
+def unindex_question(sender, instance, **kwargs):
+    search.get_backend().remove_question(instance.id)
+
+
+@receiver(post_save, sender=Answer)
+def index_answer(sender, instance, created, **kwargs):
+    if created:
+        search.get_backend().add_answer(instance.question_id, instance.text)
+    else:
+        search.get_backend().index_question(instance.question_id)
+
+
+@receiver(post_delete, sender=Answer)
+def unindex_answer(sender, instance, **kwargs):
+    search.get_backend().index_question(instance.question_id)
+
+
+@receiver(pre_save, sender=Answer)
+def remember_confirmed(sender, instance, using, **kwargs):
+    # new answers (post_answer) cost no query
+    instance._was_confirmed = not instance._state.adding and (
+        Answer.objects.using(using).filter(id=instance.id, confirmed=True).exists()
+    )
+
+
+@receiver(post_save, sender=Answer)
+def count_accepted(sender, instance, **kwargs):
+    was_confirmed = instance.__dict__.pop('_was_confirmed', False)
+    if instance.confirmed != was_confirmed:
+        user_stats.accepted_changed(instance.user_id, 1 if instance.confirmed else -1)
+
+
+@receiver(post_delete, sender=Answer)
+def uncount_accepted(sender, instance, **kwargs):
+    if instance.confirmed:
+        user_stats.accepted_changed(instance.user_id, -1)
+
+
+@receiver(post_save, sender=Tag)
+def index_tag(sender, instance, created, **kwargs):
+    if created:
+        tag_index.add(instance.id, instance.name)
+
+
+def _change_question_counts(tag_counts, sign):
+    """Add sign * n to question_count of tags by {tag_id: n}, one UPDATE per distinct n"""
+    by_count = defaultdict(list)
+    for tag_id, count in tag_counts.items():
+        by_count[count].append(tag_id)
+    for count, tag_ids in by_count.items():
+        Tag.objects.filter(id__in=tag_ids).update(question_count=F('question_count') + sign * count)
+        tag_index.used(tag_ids, sign * count)
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def count_tag_questions(sender, instance, action, reverse, pk_set, **kwargs):
+    # instance is Tag and pk_set are question ids for reverse changes (tag.question_set)
+    if action in ('pre_remove', 'pre_clear'):
+        # remember links which really exist, only they will be removed
+        links = sender.objects.filter(**{'tag_id' if reverse else 'question_id': instance.id})
+        if action == 'pre_remove':
+            links = links.filter(**{'question_id__in' if reverse else 'tag_id__in': pk_set})
+        instance._removed_tag_ids = list(links.values_list('tag_id', flat=True))
+        return
+    if action == 'post_add':
+        # pk_set has only really added objects
+        tag_ids, sign = [instance.id] * len(pk_set) if reverse else pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        tag_ids, sign = instance.__dict__.pop('_removed_tag_ids', []), -1
+    else:
+        return
+    _change_question_counts(Counter(tag_ids), sign)
+
+
+@receiver(pre_delete, sender=Question)
+def uncount_question_tags(sender, instance, **kwargs):
+    # links are deleted by cascade, without m2m_changed
+    _change_question_counts(Counter(instance.tags.values_list('id', flat=True)), -1)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.id)
+
+
+@receiver(post_save, sender=UserReq)
+@receiver(post_delete, sender=UserReq)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    user_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=UserReq)
+def create_user_stats(sender, instance, created, using, **kwargs):
+    # users of bulk import get their rows from rebuild_user_stats
+    if created:
+        UserStats.objects.using(using).create(user=instance)
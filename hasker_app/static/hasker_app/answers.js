@@ -0,0 +1,26 @@
+// Load next pages of answers when reader scrolls to the end of loaded ones.
+// Without JavaScript "more answers" link opens the next page.
+(function () {
+    var loading = false;
+
+    function loadMore() {
+        var more = $('#more_answers');
+        if (loading || !more.length || more.offset().top > $(window).scrollTop() + $(window).height() + 300) {
+            return;
+        }
+        loading = true;
+        $.getJSON(more.attr('data-url')).done(function (result) {
+            more.before(result.html);
+            if (result.next) {
+                more.attr('data-url', result.next);
+            } else {
+                more.remove();
+            }
+        }).always(function () {
+            loading = false;
+        });
+    }
+
+    $(window).on('scroll resize', loadMore);
+    $(loadMore);
+})();
@@ -0,0 +1,24 @@
+// Load tagator autocomplete options from server while user types tag prefix.
+function tagAutocomplete(source, url) {
+    var lastQuery = null;
+    var timer = null;
+    $(document).on('keyup', '.tagator_input', function () {
+        var input = $(this);
+        var query = input.val().trim();
+        if (query === lastQuery) {
+            return;
+        }
+        lastQuery = query;
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            $.getJSON(url, {q: query}, function (result) {
+                if (query !== lastQuery) {
+                    return;
+                }
+                source.tagator('autocomplete', result.tags);
+                // let tagator redraw options, query is unchanged so no new request is sent
+                input.trigger($.Event('keyup', {keyCode: 0}));
+            });
+        }, 150);
+    });
+}
@@ -0,0 +1,24 @@
+// Send votes to JSON endpoint and update widget without page reload.
+// Without JavaScript vote forms still work through vote_up/vote_down redirects.
+$(document).on('submit', 'form.vote_form', function (event) {
+    event.preventDefault();
+    var form = $(this);
+    var widget = form.closest('div.vote');
+    var csrf = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]*)/);
+    $.ajax({
+        url: widget.data('url'),
+        method: 'POST',
+        data: {direction: form.data('direction')},
+        headers: {'X-CSRFToken': csrf ? decodeURIComponent(csrf[1]) : ''},
+        dataType: 'json'
+    }).done(function (result) {
+        widget.find('p.shrink').text(result.rating);
+        widget.find('form.vote_form').each(function () {
+            var selected = $(this).data('direction') === 'up' ? result.vote > 0 : result.vote < 0;
+            $(this).find('button').prop('disabled', selected);
+            $(this).find('path').toggleClass('selected', selected);
+        });
+    }).fail(function () {
+        form[0].submit();
+    });
+});
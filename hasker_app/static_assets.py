@@ -0,0 +1,226 @@
+import gzip
+import json
+import mimetypes
+import mmap
+import os
+import posixpath
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml')
+# (Content-Encoding, file suffix), in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ORIGINAL_CACHE_CONTROL = 'public, max-age=60'
+
+
+def _compress(path):
+    """Write .gz (and .br, if brotli is installed) next to file when it makes file smaller"""
+    with open(path, 'rb') as source:
+        content = source.read()
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """collectstatic storage: file names are fingerprinted by content hash (see
+    staticfiles.json manifest) and text files are precompressed for StaticAssetsApplication.
+
+    Until collectstatic is run there is no manifest, so original names are used.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if (
+                not dry_run and
+                isinstance(hashed_name, str) and
+                hashed_name.endswith(COMPRESSIBLE_EXTENSIONS)
+            ):
+                _compress(self.path(hashed_name))
+            yield name, hashed_name, processed
+
+
+def accepted_encodings(header):
+    """Codings of Accept-Encoding header with non-zero quality"""
+    result = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            result.add(coding.strip().lower())
+    return result
+
+
+class StaticAsset:
+    """One static file with its precompressed variants, kept in memory (or mmap
+    for files larger than STATIC_MEMORY_LIMIT)"""
+
+    def __init__(self, path, cache_control, memory_limit):
+        self.cache_control = cache_control
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type == 'application/javascript':
+            self.content_type += '; charset=utf-8'
+        stat = os.stat(path)
+        etag = '{:x}-{:x}'.format(int(stat.st_mtime), stat.st_size)
+        self.variants = {'identity': self._load(path, memory_limit)}
+        # every representation has its own strong ETag
+        self.etags = {'identity': f'"{etag}"'}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants[encoding] = self._load(path + suffix, memory_limit)
+                self.etags[encoding] = f'"{etag}-{encoding}"'
+
+    @staticmethod
+    def _load(path, memory_limit):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= memory_limit or size == 0:
+                return f.read()
+            # mapping stays valid after file is closed
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def choose(self, accept_encoding):
+        if len(self.variants) > 1:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding, _ in ENCODINGS:
+                if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                    return encoding, self.variants[encoding]
+        return 'identity', self.variants['identity']
+
+
+def _chunks(content, size=64 * 1024):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+class StaticAssetsApplication:
+    """WSGI middleware serving files built by collectstatic before Django is called.
+
+    Files listed in STATIC_ROOT/staticfiles.json are loaded at start: fingerprinted
+    names get far-future immutable caching, original names a short one. Response
+    body is chosen by Accept-Encoding among precompressed variants. Any other
+    request (or every request, if there is no manifest) goes to wrapped application.
+    """
+
+    def __init__(self, application, static_root=None, static_url=None, memory_limit=None):
+        self.application = application
+        self.static_root = static_root or settings.STATIC_ROOT
+        self.static_url = static_url or settings.STATIC_URL
+        if memory_limit is None:
+            memory_limit = getattr(settings, 'STATIC_MEMORY_LIMIT', 256 * 1024)
+        self.assets = self._load_assets(memory_limit)
+
+    def _load_assets(self, memory_limit):
+        manifest_path = os.path.join(self.static_root, CompressedManifestStorage.manifest_name)
+        try:
+            with open(manifest_path) as f:
+                paths = json.load(f).get('paths', {})
+        except (OSError, ValueError):
+            return {}
+        assets = {}
+        for name, hashed_name in paths.items():
+            for file_name, cache_control in (
+                (hashed_name, IMMUTABLE_CACHE_CONTROL),
+                (name, ORIGINAL_CACHE_CONTROL),
+            ):
+                path = os.path.join(self.static_root, *file_name.split('/'))
+                if file_name not in assets and os.path.isfile(path):
+                    assets[file_name] = StaticAsset(path, cache_control, memory_limit)
+        return assets
+
+    def _find(self, path_info):
+        if not self.assets or not path_info.startswith(self.static_url):
+            return None
+        name = posixpath.normpath(unquote(path_info[len(self.static_url):])).lstrip('/')
+        return self.assets.get(name)
+
+    def response(self, path_info, method, accept_encoding, if_none_match):
+        """(status, headers, body chunks) of static asset, None if request is for wrapped application"""
+        asset = self._find(path_info)
+        if asset is None or method not in ('GET', 'HEAD'):
+            return None
+
+        encoding, content = asset.choose(accept_encoding)
+        headers = [
+            ('Cache-Control', asset.cache_control),
+            ('ETag', asset.etags[encoding]),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        etags = parse_etags(if_none_match) if if_none_match else []
+        if asset.etags[encoding] in etags or '*' in etags:
+            return '304 Not Modified', headers, []
+
+        headers += [
+            ('Content-Type', asset.content_type),
+            ('Content-Length', str(len(content))),
+        ]
+        if encoding != 'identity':
+            headers.append(('Content-Encoding', encoding))
+        if method == 'HEAD':
+            return '200 OK', headers, []
+        if isinstance(content, bytes):
+            return '200 OK', headers, [content]
+        return '200 OK', headers, _chunks(content)
+
+    def __call__(self, environ, start_response):
+        response = self.response(
+            environ.get('PATH_INFO', ''),
+            environ.get('REQUEST_METHOD'),
+            environ.get('HTTP_ACCEPT_ENCODING', ''),
+            environ.get('HTTP_IF_NONE_MATCH', ''),
+        )
+        if response is None:
+            return self.application(environ, start_response)
+        status, headers, body = response
+        start_response(status, headers)
+        return body
+
+
+class StaticAssetsAsgiApplication(StaticAssetsApplication):
+    """ASGI version of StaticAssetsApplication, so both handlers serve the same files the same way"""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.application(scope, receive, send)
+        request_headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope['headers']}
+        response = self.response(
+            scope['path'],
+            scope['method'],
+            request_headers.get('accept-encoding', ''),
+            request_headers.get('if-none-match', ''),
+        )
+        if response is None:
+            return await self.application(scope, receive, send)
+        status, headers, body = response
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split()[0]),
+            'headers': [(name.encode('latin1'), value.encode('latin1')) for name, value in headers],
+        })
+        for chunk in body:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
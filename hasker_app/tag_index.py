@@ -0,0 +1,92 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+
+from hasker_app.models import Tag
+
+
+class TagPrefixIndex:
+    """In-process prefix index of tags for autocomplete.
+
+    Tags are kept as sorted array of (lowercased name, id), so prefix search is
+    two binary searches; matches are ranked by number of questions with the tag.
+    Tags created in this process are added by signals, tags created by other
+    processes are loaded by id every TAG_INDEX_SYNC_INTERVAL seconds, usage
+    counters are fully reloaded every TAG_INDEX_REBUILD_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._names = {}
+            self._usage = {}
+            self._last_id = 0
+            self._synced_at = None
+            self._built_at = None
+
+    @property
+    def loaded(self):
+        return self._built_at is not None
+
+    def _insert(self, tag_id, name, usage=0):
+        if tag_id in self._names:
+            return
+        bisect.insort(self._keys, (name.lower(), tag_id))
+        self._names[tag_id] = name
+        self._usage[tag_id] = usage
+        self._last_id = max(self._last_id, tag_id)
+
+    def rebuild(self):
+        rows = Tag.objects.values_list('id', 'name', 'question_count')
+        with self._lock:
+            self.clear()
+            self._keys = sorted((name.lower(), tag_id) for tag_id, name, _ in rows)
+            self._names = {tag_id: name for tag_id, name, _ in rows}
+            self._usage = {tag_id: usage for tag_id, _, usage in rows}
+            self._last_id = max(self._names, default=0)
+            self._built_at = self._synced_at = time.time()
+
+    def sync(self):
+        """Load tags created since last sync (e.g. by other processes)"""
+        rows = Tag.objects.filter(id__gt=self._last_id).values_list('id', 'name', 'question_count')
+        with self._lock:
+            for tag_id, name, usage in rows:
+                self._insert(tag_id, name, usage)
+            self._synced_at = time.time()
+
+    def _refresh(self):
+        now = time.time()
+        if not self.loaded or now - self._built_at > getattr(settings, 'TAG_INDEX_REBUILD_INTERVAL', 600):
+            self.rebuild()
+        elif now - self._synced_at > getattr(settings, 'TAG_INDEX_SYNC_INTERVAL', 30):
+            self.sync()
+
+    def add(self, tag_id, name):
+        with self._lock:
+            if self.loaded:
+                self._insert(tag_id, name)
+
+    def used(self, tag_ids, delta=1):
+        with self._lock:
+            for tag_id in tag_ids:
+                if tag_id in self._usage:
+                    self._usage[tag_id] += delta
+
+    def search(self, prefix, limit=10):
+        self._refresh()
+        key = prefix.strip().lower()
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (key,))
+            end = bisect.bisect_left(self._keys, (key + '\uffff',))
+            best = heapq.nsmallest(limit, self._keys[start:end], key=lambda x: (-self._usage[x[1]], x[0]))
+            return [self._names[tag_id] for _, tag_id in best]
+
+
+tag_index = TagPrefixIndex()
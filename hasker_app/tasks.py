@@ -0,0 +1,138 @@
+"""Deferred work in database table.
+
+Views enqueue tasks in their own transaction, so a task exists only if the change that caused
+it is committed. `manage.py run_tasks` claims due tasks with SELECT ... FOR UPDATE SKIP LOCKED
+and runs them holding the locks: workers don't wait for each other, and tasks of a crashed
+worker are unlocked with its transaction. Handlers get payloads of a whole batch and may run
+more than once (mail can be sent before failure of the batch, then tasks of the failed batch
+run again one by one), so they should tolerate it.
+"""
+import json
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from hasker_app.models import Answer, Task
+
+logger = logging.getLogger(__name__)
+
+# task name -> function of list of payloads
+HANDLERS = {}
+
+
+def handler(name):
+    """Register function running claimed tasks with name, it gets list of their payloads"""
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, run_at=None, **payload):
+    return Task.objects.create(name=name, payload=json.dumps(payload), run_at=run_at or timezone.now())
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, 'TASK_RETRY_DELAY', 30) * 2 ** (attempts - 1))
+
+
+def _run(name, tasks):
+    """Run handler of tasks, returns its exception; writes of failed handler are rolled back"""
+    try:
+        with transaction.atomic():
+            HANDLERS[name]([json.loads(x.payload) for x in tasks])
+    except Exception as e:
+        return e
+    return None
+
+
+def run_batch(batch_size=None):
+    """Claim up to batch_size due tasks and run them grouped by name, returns number of claimed tasks.
+
+    Tasks of failed group are run one by one, so only the ones which fail alone are retried.
+    """
+    batch_size = batch_size or getattr(settings, 'TASK_BATCH_SIZE', 100)
+    max_attempts = getattr(settings, 'TASK_MAX_ATTEMPTS', 5)
+    with transaction.atomic():
+        tasks = list(
+            Task
+            .objects
+            .select_for_update(skip_locked=True)
+            .filter(failed=False, run_at__lte=timezone.now())
+            .order_by('run_at', 'id')[:batch_size]
+        )
+        groups = defaultdict(list)
+        for task in tasks:
+            groups[task.name].append(task)
+        done = []
+        for name, group in groups.items():
+            error = _run(name, group)
+            if error is None:
+                done.extend(x.id for x in group)
+                continue
+            failed = []
+            if len(group) > 1:
+                logger.warning('%s tasks %s failed (%s: %s), running them one by one',
+                               len(group), name, type(error).__name__, error)
+                for task in group:
+                    task_error = _run(name, [task])
+                    if task_error is None:
+                        done.append(task.id)
+                    else:
+                        failed.append((task, task_error))
+            else:
+                failed.append((group[0], error))
+            for task, task_error in failed:
+                logger.error('task %s %s failed', name, task.id, exc_info=task_error)
+                task.attempts += 1
+                task.last_error = f'{type(task_error).__name__}: {task_error}'
+                task.failed = task.attempts >= max_attempts
+                task.run_at = timezone.now() + retry_delay(task.attempts)
+            Task.objects.bulk_update([x for x, _ in failed], ['attempts', 'last_error', 'failed', 'run_at'])
+        Task.objects.filter(id__in=done).delete()
+    return len(tasks)
+
+
+def _subject_label(question):
+    # label may be empty, line breaks are not allowed in header (BadHeaderError)
+    return ' '.join((question.label or '').splitlines()) or f'question {question.id}'
+
+
+@handler('notify_answers')
+def notify_answers(payloads):
+    """One mail to every question author about all new answers of the batch"""
+    answers = (
+        Answer
+        .objects
+        .filter(id__in=[x['answer_id'] for x in payloads])
+        .select_related('user__user', 'question__user__user')
+        .order_by('question_id', 'created_date')
+    )
+    by_author = defaultdict(list)
+    for answer in answers:
+        author = answer.question.user
+        # deleted author, no address, or own answer
+        if author is None or not author.user.email or author.id == answer.user_id:
+            continue
+        by_author[author.user].append(answer)
+    messages = [
+        EmailMessage(
+            subject=f'{len(user_answers)} new answers to your questions' if len(user_answers) > 1
+            else f'New answer to "{_subject_label(user_answers[0].question)}"',
+            body=render_to_string('hasker_app/answer_notification.txt', {
+                'user': user,
+                'answers': user_answers,
+                'site_url': getattr(settings, 'SITE_URL', ''),
+            }),
+            to=[user.email],
+        )
+        for user, user_answers in by_author.items()
+    ]
+    if messages:
+        get_connection().send_messages(messages)
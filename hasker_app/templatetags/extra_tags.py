@@ -1,20 +1,29 @@
 from django import template
+from django.core.files.storage import default_storage
+
+from hasker_app import thumbnails
 
 register = template.Library()
 
 
-@register.inclusion_tag('hasker_app/vote.html')
-def vote(obj, user):
+@register.inclusion_tag('hasker_app/vote.html', takes_context=True)
+def vote(context, obj, user):
+    obj_type = type(obj).__name__.lower()
     current_rate = 0
     if user.is_authenticated:
-        user_rate = obj.rates.filter(user__user=user).all()
-        if list(user_rate):
-            current_rate = user_rate[0].rate
+        user_votes = context.get('user_votes')
+        if user_votes is not None:
+            # votes preloaded by view, see views.load_user_votes
+            current_rate = user_votes.get((obj_type, obj.id), 0)
+        else:
+            user_rate = obj.rates.filter(user__user=user).all()
+            if list(user_rate):
+                current_rate = user_rate[0].rate
     return {
-        'rate': obj.rate,
+        'rate': obj.rating,
         'current': current_rate,
         'object': obj,
-        'type': type(obj).__name__.lower(),
+        'type': obj_type,
         'user': user
     }
 
@@ -22,3 +31,32 @@ def vote(obj, user):
 @register.simple_tag
 def define(val=None):
     return val
+
+
+@register.simple_tag
+def query_replace(request, key, value):
+    """Current url with GET parameter replaced, page number is dropped"""
+    params = request.GET.copy()
+    params.pop('page', None)
+    params[key] = value
+    return f'{request.path}?{params.urlencode()}'
+
+
+@register.inclusion_tag('hasker_app/avatar.html')
+def avatar(user_req, size, css_class='avatar'):
+    """Avatar thumbnail of given size (and 2x one), original image while thumbnails are not ready"""
+    context = {'css_class': css_class, 'url': '', 'thumbnails': None}
+    if user_req is None:
+        return context
+    if not user_req.avatar_hash:
+        context['url'] = user_req.avatar.url
+        return context
+    double_size = size * 2 if size * 2 in thumbnails.SIZES else size
+    context['thumbnails'] = {
+        extension: (
+            default_storage.url(thumbnails.thumbnail_name(user_req.avatar_hash, size, extension)),
+            default_storage.url(thumbnails.thumbnail_name(user_req.avatar_hash, double_size, extension))
+        )
+        for extension in thumbnails.FORMATS
+    }
+    return context
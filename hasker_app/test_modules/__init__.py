@@ -1,5 +1,20 @@
 from .test_answers import *
+from .test_benchmark import *
+from .test_concurrency import *
+from .test_counters import *
+from .test_db_router import *
+from .test_feeds import *
+from .test_jsonl import *
+from .test_page_cache import *
+from .test_query_budget import *
 from .test_question_ask import *
+from .test_question_list import *
 from .test_question_view import *
 from .test_search import *
+from .test_side_panel import *
+from .test_static_assets import *
+from .test_tag_list import *
+from .test_tasks import *
 from .test_user import *
+from .test_user_cache import *
+from .test_user_stats import *
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.test import override_settings
+
+from hasker_app.instrumentation import get_query_budget
+
+
+def memory_sessions_cache(test):
+    """Run test with 'sessions' cache in memory, as memcached of production is: query
+    budgets don't include lookups of database cache used without python-memcached"""
+    return override_settings(CACHES=dict(settings.CACHES, sessions={
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hasker_test_sessions',
+    }))(test)
+
+
+class QueryBudgetMixin:
+    """assertWithinBudget checks number of queries of response (counted by
+    InstrumentationMiddleware) against query_budget declared by its view,
+    or against its cold budget for requests with empty caches"""
+
+    def assertWithinBudget(self, response, cold=False):
+        metrics = response.metrics
+        self.assertIsNotNone(metrics.query_budget, f'{metrics.view_name} has no query budget')
+        budget = metrics.cold_query_budget if cold else metrics.query_budget
+        self.assertLessEqual(
+            metrics.query_count,
+            budget,
+            '{} made {} queries, {}budget is {}:\n{}'.format(
+                metrics.view_name,
+                metrics.query_count,
+                'cold ' if cold else '',
+                budget,
+                '\n'.join(sql for sql, _ in metrics.queries)
+            )
+        )
+
+    def assertViewHasBudget(self, view):
+        self.assertIsNotNone(get_query_budget(view), view)
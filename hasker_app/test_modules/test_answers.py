@@ -1,7 +1,13 @@
+import re
+from io import StringIO
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
-from django.test import TestCase, Client
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from hasker_app.models import UserReq, Question, Tag, Answer, UserRate
@@ -39,6 +45,7 @@ class TestAnswer(TestCase):
                     answer=answer,
                     rate=x
                 )
+        call_command('rebuild_counters', stdout=StringIO())
         self.question_id = question.id
 
     def test_get_list(self):
@@ -57,6 +64,77 @@ class TestAnswer(TestCase):
             )
         )
 
+    def test_user_votes_loaded_once(self):
+        c = Client()
+        c.login(**self.login_data)
+        with CaptureQueriesContext(connection) as queries:
+            response = c.get(reverse('question_detail', args=[self.question_id]))
+        rate_queries = [x for x in queries.captured_queries if 'hasker_app_userrate' in x['sql']]
+        self.assertEqual(len(rate_queries), 1)
+        answers = list(Answer.objects.filter(question_id=self.question_id, rates__isnull=False))
+        self.assertDictEqual(
+            response.context['user_votes'],
+            {('answer', x.id): x.rates.get().rate for x in answers}
+        )
+        self.assertContains(response, 'class="selected"', count=len(answers))
+
+    def test_answer_fragment_keeps_user_vote(self):
+        other = User.objects.create_user(username='test_2', password='test_password')
+        UserReq.objects.create(user=other)
+        c = Client()
+        c.login(**self.login_data)
+        response = c.get(reverse('question_detail', args=[self.question_id]))
+        self.assertContains(response, 'class="selected"', count=4)
+        c = Client()
+        c.login(username='test_2', password='test_password')
+        response = c.get(reverse('question_detail', args=[self.question_id]))
+        self.assertNotContains(response, 'class="selected"')
+
+    @override_settings(ANSWERS_PER_PAGE=8)
+    def test_answer_pages(self):
+        c = Client()
+        c.login(**self.login_data)
+        response = c.get(reverse('question_detail', args=[self.question_id]))
+        answer_ids = [x.id for x in response.context['object_list']]
+        self.assertEqual(len(answer_ids), 8)
+        self.assertTrue(response.context['object_list'][0].confirmed)
+        self.assertContains(response, 'id="more_answers"')
+
+        next_cursor = response.context['answers_page'].next_cursor
+        url = reverse('question_answers', args=[self.question_id]) + '?cursor=' + next_cursor
+        selected = 0
+        while url:
+            result = c.get(url).json()
+            selected += result['html'].count('class="selected"')
+            answer_ids += [int(x) for x in re.findall(r'data-url="/answer/(\d+)/vote"', result['html'])]
+            url = result['next']
+        self.assertEqual(
+            answer_ids,
+            list(
+                Answer
+                .objects
+                .filter(question_id=self.question_id)
+                .order_by('-confirmed', '-rating', '-created_date', '-id')
+                .values_list('id', flat=True)
+            )
+        )
+        # votes of user on later pages are shown too
+        self.assertEqual(selected + response.content.decode().count('class="selected"'), 4)
+
+    @override_settings(ANSWERS_PER_PAGE=8)
+    def test_answer_page_without_javascript(self):
+        response = Client().get(reverse('question_detail', args=[self.question_id]))
+        next_page = Client().get(
+            reverse('question_detail', args=[self.question_id]),
+            {'cursor': response.context['answers_page'].next_cursor}
+        )
+        self.assertEqual(len(next_page.context['object_list']), 8)
+        self.assertFalse(set(next_page.context['object_list']) & set(response.context['object_list']))
+
+    def test_answer_page_invalid_cursor(self):
+        response = Client().get(reverse('question_answers', args=[self.question_id]), {'cursor': 'wrong'})
+        self.assertEqual(response.status_code, 404)
+
     def test_check_add_form(self):
         c = Client()
         c.login(**self.login_data)
@@ -0,0 +1,92 @@
+import json
+import random
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+
+from hasker_app import search, urls
+from hasker_app.management.commands.benchmark_routes import ROUTES, percentile
+from hasker_app.management.commands.generate_dataset import ZipfSampler
+from hasker_app.models import Answer, Question, Tag, UserRate, UserReq
+
+DATASET_OPTIONS = ['--users', '5', '--tags', '10', '--questions', '20', '--answers', '40', '--votes', '60']
+
+
+class TestGenerateDataset(TestCase):
+    def test_generate(self):
+        call_command('generate_dataset', *DATASET_OPTIONS, stdout=StringIO())
+        self.assertEqual(UserReq.objects.filter(user__username__startswith='gen_user_').count(), 5)
+        self.assertEqual(Tag.objects.count(), 10)
+        self.assertEqual(Question.objects.count(), 20)
+        self.assertEqual(Answer.objects.count(), 40)
+        self.assertTrue(0 < UserRate.objects.count() <= 60)
+        self.assertEqual(Question.objects.filter(tags=None).count(), 0)
+        for question in Question.objects.all():
+            self.assertEqual(question.answer_count, question.answers.count())
+            self.assertEqual(question.rating, question.rates.aggregate(total=Sum('rate'))['total'] or 0)
+        for answer in Answer.objects.select_related('question'):
+            self.assertGreaterEqual(answer.created_date, answer.question.created_date)
+        word = Question.objects.first().label.split()[0].rstrip('?')
+        self.assertTrue(search.get_backend().search(Question.objects.all(), word).exists())
+
+    def test_generate_again(self):
+        call_command('generate_dataset', *DATASET_OPTIONS, stdout=StringIO())
+        call_command('generate_dataset', *DATASET_OPTIONS, stdout=StringIO())
+        self.assertEqual(UserReq.objects.count(), 10)
+        self.assertEqual(Tag.objects.count(), 10)
+        self.assertEqual(Question.objects.count(), 40)
+
+    def test_zipf_sampler(self):
+        sampler = ZipfSampler(range(100), 1.1, random.Random(0))
+        counts = {}
+        for _ in range(10000):
+            item = sampler.pick()
+            counts[item] = counts.get(item, 0) + 1
+        self.assertEqual(max(counts, key=counts.get), sampler.items[0])
+        self.assertGreater(counts[sampler.items[0]], 10 * counts.get(sampler.items[50], 0))
+        self.assertEqual(len(sampler.pick_distinct(3)), 3)
+
+
+class TestBenchmarkRoutes(TransactionTestCase):
+    def test_all_routes_covered(self):
+        self.assertEqual({x.name for x in ROUTES}, {x.name for x in urls.urlpatterns})
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_benchmark(self):
+        call_command('generate_dataset', *DATASET_OPTIONS, stdout=StringIO())
+        out = StringIO()
+        call_command('benchmark_routes', '--requests', '2', '--concurrency', '1', '--host', 'testserver', stdout=out)
+        result = json.loads(out.getvalue())
+        self.assertEqual(result['format'], 1)
+        self.assertEqual(set(result['routes']), {x.label for x in ROUTES})
+        for label, route in result['routes'].items():
+            self.assertEqual(route['errors'], 0, label)
+            self.assertEqual(route['requests'], 2)
+            self.assertIsInstance(route['queries'], int)
+            self.assertEqual(set(route['latency_ms']), {'p50', 'p95', 'p99', 'max'})
+        self.assertEqual(result['total']['requests'], 2 * len(ROUTES))
+
+    def test_failed_requests_reported(self):
+        call_command('generate_dataset', *DATASET_OPTIONS, stdout=StringIO())
+        out, err = StringIO(), StringIO()
+        with mock.patch('hasker_app.tag_index.tag_index.search', side_effect=RuntimeError('test error')), \
+                self.assertLogs('django.request', 'ERROR'):
+            call_command(
+                'benchmark_routes', '--requests', '3', '--concurrency', '1', '--host', 'testserver',
+                '--routes', 'tag_autocomplete', stdout=out, stderr=err
+            )
+        route = json.loads(out.getvalue())['routes']['tag_autocomplete']
+        self.assertEqual(route['requests'], 3)
+        self.assertEqual(route['errors'], 3)
+        self.assertEqual(route['error_statuses'], {'500': 3})
+        # failed requests are not latency samples
+        self.assertIsNone(route['latency_ms']['p50'])
+        self.assertIn('tag_autocomplete: 3 of 3 requests failed', err.getvalue())
@@ -0,0 +1,100 @@
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from hasker_app import concurrency
+from hasker_app.concurrency import run_concurrently
+from hasker_app.models import UserReq, Question, Answer, UserRate
+
+
+class TestRunConcurrently(SimpleTestCase):
+    def test_results_by_name(self):
+        result = run_concurrently({'a': lambda: 1, 'b': lambda: 2, 'c': threading.get_ident})
+        self.assertEqual(result['a'], 1)
+        self.assertEqual(result['b'], 2)
+        self.assertNotEqual(result['c'], threading.get_ident())
+
+    @override_settings(CONCURRENT_QUERY_WORKERS=0)
+    def test_disabled(self):
+        result = run_concurrently({'a': threading.get_ident, 'b': threading.get_ident})
+        self.assertEqual(result, {'a': threading.get_ident(), 'b': threading.get_ident()})
+
+    def test_exception_raised(self):
+        def fail():
+            raise ValueError('test')
+
+        with self.assertRaises(ValueError):
+            run_concurrently({'a': lambda: 1, 'b': fail})
+
+    def test_executor_shared_by_threads(self):
+        executors = []
+        thread = threading.Thread(target=lambda: executors.append(concurrency._get_executor()))
+        thread.start()
+        thread.join()
+        self.assertIs(executors[0], concurrency._get_executor())
+
+
+class TestConcurrentViews(TestCase):
+    # TestCase runs in transaction, so views run their queries one by one
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.question = Question.objects.create(label='test_question', text='test text', user=user.user_req)
+        self.answer = Answer.objects.create(text='test answer', question=self.question, user=user.user_req)
+        UserRate.objects.create(user=user.user_req, answer=self.answer, rate=1)
+
+    def test_inside_transaction_runs_in_thread(self):
+        # other connections can't see data of open transaction
+        result = run_concurrently({'a': threading.get_ident, 'b': lambda: Question.objects.count()})
+        self.assertEqual(result, {'a': threading.get_ident(), 'b': 1})
+
+    def test_question_page_votes(self):
+        c = Client()
+        c.login(**self.login_data)
+        response = c.get(reverse('question_detail', args=[self.question.id]))
+        self.assertEqual(response.context['user_votes'], {('answer', self.answer.id): 1})
+        self.assertEqual(list(response.context['object_list']), [self.answer])
+        self.assertEqual(response.context['question'], self.question)
+
+    def test_missing_question(self):
+        response = Client().get(reverse('question_detail', args=[self.question.id + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TestConcurrentViewsThreaded(TransactionTestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        TestConcurrentViews.setUp(self)
+
+    def test_question_page_votes(self):
+        with mock.patch('hasker_app.concurrency._run_in_worker', wraps=concurrency._run_in_worker) as run_in_worker:
+            TestConcurrentViews.test_question_page_votes(self)
+        self.assertTrue(run_in_worker.called)
+
+
+class TestBenchmarkHandlers(TransactionTestCase):
+    def test_benchmark(self):
+        out = StringIO()
+        call_command('benchmark_handlers', '--requests', '4', '--concurrency', '2', '--host', 'testserver', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('wsgi: '))
+        self.assertTrue(lines[1].startswith('asgi: '))
+        self.assertIn('errors 0', lines[0])
+        self.assertIn('errors 0', lines[1])
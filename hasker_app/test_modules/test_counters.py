@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from hasker_app.models import UserReq, Question, Answer, UserRate
+
+
+class TestCounters(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        question = Question.objects.create(
+            label='test_question',
+            text='test text',
+            user=user.user_req
+        )
+        answer = Answer.objects.create(
+            text='test answer',
+            user=user.user_req,
+            question=question
+        )
+        self.question_id = question.id
+        self.answer_id = answer.id
+
+    def test_vote_updates_question_rating(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('vote_up', args=['question', self.question_id]))
+        self.assertEqual(Question.objects.get(pk=self.question_id).rating, 1)
+        c.get(reverse('vote_up', args=['question', self.question_id]))
+        self.assertEqual(Question.objects.get(pk=self.question_id).rating, 1)
+        c.get(reverse('vote_down', args=['question', self.question_id]))
+        self.assertEqual(Question.objects.get(pk=self.question_id).rating, 0)
+
+    def test_vote_updates_answer_rating(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('vote_down', args=['answer', self.answer_id]))
+        self.assertEqual(Answer.objects.get(pk=self.answer_id).rating, -1)
+        self.assertEqual(Question.objects.get(pk=self.question_id).rating, 0)
+
+    def test_post_answer_updates_answer_count(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.post(reverse('post_answer', args=[self.question_id]), {'text': 'answer'})
+        self.assertEqual(Question.objects.get(pk=self.question_id).answer_count, 1)
+
+    def test_rebuild_counters(self):
+        user_req = UserReq.objects.get()
+        UserRate.objects.create(user=user_req, question_id=self.question_id, rate=1)
+        UserRate.objects.create(user=user_req, answer_id=self.answer_id, rate=-1)
+        Question.objects.update(rating=100, answer_count=100)
+        call_command('rebuild_counters', stdout=StringIO())
+        question = Question.objects.get(pk=self.question_id)
+        self.assertEqual(question.rating, 1)
+        self.assertEqual(question.answer_count, 1)
+        self.assertEqual(Answer.objects.get(pk=self.answer_id).rating, -1)
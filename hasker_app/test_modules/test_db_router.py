@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from hasker_app import db_router, page_cache
+from hasker_app.models import UserReq, Question
+
+REPLICA = 'test_replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], CONCURRENT_QUERY_WORKERS=0, PAGE_CACHE_TTL=0)
+class TestReplicaRouter(TestCase):
+    """Replica is a separate SQLite database without replication, so rows of
+    primary are not there and it shows which database served the page
+    """
+    databases = {'default', REPLICA}
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.replica_dir.name, 'replica.sqlite3'),
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        cls.replica_dir.cleanup()
+
+    def setUp(self) -> None:
+        for db in ('default', REPLICA):
+            user = User.objects.db_manager(db).create_user(username='test_1', password='test_password')
+            UserReq.objects.using(db).create(user=user, avatar='../static/hasker_app/default_avatar.jpg')
+            Question.objects.using(db).create(label=f'test_question_{db}', text='test text', user=user.user_req)
+
+    def test_reads_from_replica(self):
+        c = Client()
+        c.login(**self.login_data)
+        response = c.get(reverse('question_list'))
+        self.assertContains(response, f'test_question_{REPLICA}')
+        self.assertNotContains(response, 'test_question_default')
+        self.assertNotIn(db_router.STICKY_COOKIE, response.cookies)
+
+    def test_sticky_after_write(self):
+        c = Client()
+        c.login(**self.login_data)
+        question = Question.objects.get()
+        response = c.post(reverse('post_answer', args=[question.id]), {'text': 'test answer'})
+        self.assertIn(db_router.STICKY_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[db_router.STICKY_COOKIE]['max-age'], 10)
+
+        response = c.get(reverse('question_detail', args=[question.id]))
+        self.assertContains(response, 'test answer')
+        response = c.get(reverse('question_list'))
+        self.assertContains(response, 'test_question_default')
+
+        # sticky window is over
+        del c.cookies[db_router.STICKY_COOKIE]
+        self.assertContains(c.get(reverse('question_list')), f'test_question_{REPLICA}')
+
+    def test_vote_goes_to_primary(self):
+        c = Client()
+        c.login(**self.login_data)
+        question = Question.objects.get()
+        response = c.get(reverse('vote_up', args=['question', question.id]))
+        self.assertIn(db_router.STICKY_COOKIE, response.cookies)
+        self.assertEqual(Question.objects.get().rating, 1)
+        self.assertEqual(Question.objects.using(REPLICA).get().rating, 0)
+
+    def test_no_replicas(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertContains(Client().get(reverse('question_list')), 'test_question_default')
+
+    def test_views_without_replica_reads(self):
+        self.assertFalse(db_router.reads_from_replica(resolve(reverse('ask_question')).func))
+        self.assertTrue(db_router.reads_from_replica(resolve(reverse('question_detail', args=[1])).func))
+        self.assertTrue(db_router.reads_from_replica(resolve(reverse('question_feed', args=['rss'])).func))
+
+    @override_settings(PAGE_CACHE_TTL=300)
+    def test_replica_does_not_poison_page_cache(self):
+        cache.clear()
+        question = Question.objects.get()
+        # change just written to primary, replica has not got it yet
+        page_cache.bump(question.id)
+        for url in (reverse('question_list'), reverse('question_detail', args=[question.id])):
+            response = Client().get(url)
+            self.assertEqual(response['X-Page-Cache'], 'miss')
+            self.assertContains(response, 'test_question_default')
+            etag = response['ETag'] if response.has_header('ETag') else None
+
+            with override_settings(REPLICA_STICKY_SECONDS=0):
+                # replica may serve the version now, but the page is cached already
+                response = Client().get(url)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+                self.assertContains(response, 'test_question_default')
+                if etag:
+                    self.assertEqual(Client().get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    @override_settings(PAGE_CACHE_TTL=300, REPLICA_STICKY_SECONDS=0)
+    def test_replica_reads_of_settled_version(self):
+        cache.clear()
+        page_cache.bump()
+        self.assertContains(Client().get(reverse('question_list')), f'test_question_{REPLICA}')
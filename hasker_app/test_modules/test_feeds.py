@@ -0,0 +1,89 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from hasker_app import page_cache
+from hasker_app.models import UserReq, Tag, Question
+
+
+class TestFeeds(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.user_req = user.user_req
+        self.tag = Tag.objects.create(name='test_tag')
+        now = timezone.now()
+        for x in range(3):
+            question = Question.objects.create(
+                label=f'test_question_{x}',
+                text='test text',
+                user=self.user_req,
+                created_date=now - timedelta(hours=3 - x)
+            )
+            if x < 2:
+                question.tags.add(self.tag)
+
+    def test_rss(self):
+        response = Client().get(reverse('question_feed', args=['rss']))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/rss+xml'))
+        content = response.content.decode()
+        self.assertLess(content.index('test_question_2'), content.index('test_question_1'))
+        self.assertIn('<category>test_tag</category>', content)
+
+    def test_atom(self):
+        response = Client().get(reverse('question_feed', args=['atom']))
+        self.assertTrue(response['Content-Type'].startswith('application/atom+xml'))
+        self.assertIn('test_question_0', response.content.decode())
+
+    def test_json_tag_feed(self):
+        response = Client().get(reverse('tag_question_feed', args=['Test_Tag', 'json']))
+        self.assertTrue(response['Content-Type'].startswith('application/feed+json'))
+        feed = json.loads(response.content)
+        self.assertEqual([x['title'] for x in feed['items']], ['test_question_1', 'test_question_0'])
+        self.assertEqual(feed['items'][0]['authors'], [{'name': 'test_1'}])
+        self.assertEqual(feed['items'][0]['tags'], ['test_tag'])
+
+    def test_unknown_format(self):
+        self.assertEqual(Client().get(reverse('question_feed', args=['xml'])).status_code, 404)
+
+    def test_conditional_get(self):
+        c = Client()
+        url = reverse('question_feed', args=['rss'])
+        response = c.get(url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            not_modified = c.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        not_modified = c.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        Question.objects.create(label='test_question_new', text='test text', user=self.user_req)
+        page_cache.bump()
+        modified = c.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(modified.status_code, 200)
+        self.assertNotEqual(modified['ETag'], response['ETag'])
+        self.assertIn('test_question_new', modified.content.decode())
+
+    def test_tag_feed_etag(self):
+        c = Client()
+        url = reverse('tag_question_feed', args=['test_tag', 'rss'])
+        etag = c.get(url)['ETag']
+        # question without the tag doesn't change tag feed
+        Question.objects.create(label='test_question_new', text='test text', user=self.user_req)
+        self.assertEqual(c.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
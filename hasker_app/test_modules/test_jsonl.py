@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from hasker_app.management.commands.import_jsonl import Checkpoint, Command as ImportCommand, _insert
+from hasker_app.models import ImportBatch, UserReq, Question, Answer, Tag, UserRate
+
+
+class TestJsonl(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        question = Question.objects.create(
+            label='test_question',
+            text='test text',
+            user=user.user_req
+        )
+        question.tags.add(Tag.objects.create(name='python'), Tag.objects.create(name='django'))
+        for i in range(3):
+            answer = Answer.objects.create(
+                text=f'test answer {i}',
+                user=user.user_req,
+                question=question
+            )
+        UserRate.objects.create(user=user.user_req, answer=answer, rate=1)
+        UserRate.objects.create(user=user.user_req, question=question, rate=-1)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def _export(self, name='data.jsonl'):
+        path = os.path.join(self.dir.name, name)
+        call_command('export_jsonl', path, stdout=StringIO())
+        return path
+
+    def _import(self, path, **options):
+        out = StringIO()
+        call_command('import_jsonl', path, stdout=out, **options)
+        return out.getvalue()
+
+    def _clear(self):
+        Question.objects.all().delete()
+        Tag.objects.all().delete()
+        User.objects.all().delete()
+
+    def _snapshot(self):
+        question = Question.objects.get()
+        return {
+            'user': User.objects.get().check_password('test_password'),
+            'question': (question.label, question.rating, question.answer_count, question.user.user.username),
+            'tags': sorted(question.tags.values_list('name', 'question_count')),
+            'answers': sorted(question.answers.values_list('text', 'rating')),
+            'votes': UserRate.objects.count(),
+        }
+
+    def test_export_lines(self):
+        with open(self._export()) as f:
+            records = [json.loads(x) for x in f]
+        self.assertEqual(
+            [x['type'] for x in records],
+            ['user', 'tag', 'tag', 'question', 'question_tag', 'question_tag',
+             'answer', 'answer', 'answer', 'vote', 'vote']
+        )
+        self.assertEqual(records[0]['username'], 'test_1')
+
+    def test_round_trip(self):
+        before = self._snapshot()
+        path = self._export('data.jsonl.gz')
+        self._clear()
+        output = self._import(path, batch_size=2)
+        self.assertIn('answer: 3 rows', output)
+        self.assertEqual(self._snapshot(), before)
+
+    def test_import_into_existing_data(self):
+        path = self._export()
+        question_id = Question.objects.get().id
+        self._import(path)
+        # users and tags are reused, questions and answers get new ids
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(Question.objects.count(), 2)
+        new_question = Question.objects.exclude(id=question_id).get()
+        self.assertEqual(new_question.answers.count(), 3)
+        self.assertEqual(new_question.tags.count(), 2)
+        self.assertEqual(Tag.objects.get(name='python').question_count, 2)
+
+    def test_resume_from_checkpoint(self):
+        before = self._snapshot()
+        path = self._export()
+        self._clear()
+        with mock.patch.object(ImportCommand, '_import_answer', side_effect=RuntimeError('killed')):
+            with self.assertRaises(RuntimeError):
+                self._import(path, checkpoint='test_import')
+        self.assertEqual(Question.objects.count(), 1)
+        self.assertFalse(Answer.objects.exists())
+
+        output = self._import(path, checkpoint='test_import')
+        self.assertIn('Resuming after line 6', output)
+        self.assertIn('question: 0 rows', output)
+        self.assertEqual(self._snapshot(), before)
+
+        # complete import doesn't keep its checkpoint
+        self.assertFalse(ImportBatch.objects.exists())
+
+    def test_batch_and_checkpoint_committed_together(self):
+        before = self._snapshot()
+        path = self._export()
+        self._clear()
+        commit = Checkpoint.commit
+
+        def killed_on_answers(checkpoint, line, record_type, ids):
+            commit(checkpoint, line, record_type, ids)
+            if record_type == 'answer':
+                raise RuntimeError('killed')
+
+        with mock.patch.object(Checkpoint, 'commit', killed_on_answers):
+            with self.assertRaises(RuntimeError):
+                self._import(path, checkpoint='test_import')
+        # batch is rolled back with its checkpoint, so it isn't imported twice
+        self.assertFalse(Answer.objects.exists())
+        self._import(path, checkpoint='test_import')
+        self.assertEqual(self._snapshot(), before)
+
+    def test_insert_with_other_writer(self):
+        user_req = UserReq.objects.get()
+        bulk_create = Question.objects.bulk_create
+
+        def with_other_writer(objects, **kwargs):
+            Question.objects.create(label='other writer', user=user_req)
+            return bulk_create(objects, **kwargs)
+
+        with mock.patch.object(connection.features, 'can_return_rows_from_bulk_insert', False), \
+                mock.patch.object(Question.objects, 'bulk_create', with_other_writer):
+            with self.assertRaisesRegex(CommandError, 'another process'):
+                _insert(Question, [Question(label='imported', user=user_req)])
+
+    def test_unknown_id(self):
+        path = self._export()
+        with open(path) as f:
+            records = [json.loads(x) for x in f]
+        # link to question which is not in the file
+        records = [x for x in records if x['type'] != 'question']
+        with open(path, 'w') as f:
+            f.writelines(json.dumps(x) + '\n' for x in records)
+        with self.assertRaisesRegex(CommandError, 'question_tag .*: unknown question id'):
+            self._import(path)
@@ -0,0 +1,119 @@
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from hasker_app.models import UserReq, Tag, Question, Answer
+
+
+class TestPageCache(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        tag = Tag.objects.create(
+            name='test_tag'
+        )
+        question = Question.objects.create(
+            label='test_question',
+            text='test text',
+            user=user.user_req
+        )
+        question.tags.add(tag)
+        self.other_question = Question.objects.create(
+            label='other_question',
+            text='other text',
+            user=user.user_req
+        )
+        self.answer = Answer.objects.create(text='test answer', question=question, user=user.user_req)
+        self.question_id = question.id
+
+    def _get_twice(self, url):
+        c = Client()
+        response = c.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        response = c.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        return response
+
+    def test_anonymous_pages_cached(self):
+        for url in [
+            reverse('question_list'),
+            reverse('question_list_date_ordered'),
+            reverse('question_detail', args=[self.question_id]),
+            reverse('question_search') + '?search_tag=test_tag',
+        ]:
+            response = self._get_twice(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'test_question')
+
+    def test_headers_kept(self):
+        url = reverse('question_detail', args=[self.question_id])
+        first = Client().get(url)
+        response = Client().get(url)
+        self.assertEqual((first['X-Page-Cache'], response['X-Page-Cache']), ('miss', 'hit'))
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        for name in ('Content-Type', 'Cache-Control', 'ETag'):
+            self.assertEqual(response[name], first[name], name)
+
+    def test_text_search_not_cached(self):
+        c = Client()
+        response = c.get(reverse('question_search') + '?search_str=text')
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_authenticated_not_cached(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('question_list'))
+        response = c.get(reverse('question_list'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_csrf_form_not_cached(self):
+        c = Client()
+        c.get(reverse('login'))
+        response = c.get(reverse('login'))
+        self.assertNotIn('X-Page-Cache', response)
+        response = c.get(reverse('register'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_answer_invalidates_question_page(self):
+        url = reverse('question_detail', args=[self.question_id])
+        other_url = reverse('question_detail', args=[self.other_question.id])
+        self._get_twice(url)
+        self._get_twice(other_url)
+        c = Client()
+        c.login(**self.login_data)
+        c.post(reverse('post_answer', args=[self.question_id]), {'text': 'brand new answer'})
+        anonymous = Client()
+        response = anonymous.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'brand new answer')
+        self.assertEqual(anonymous.get(other_url)['X-Page-Cache'], 'hit')
+
+    def test_answer_vote_keeps_lists(self):
+        self._get_twice(reverse('question_list'))
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('vote_up', args=['answer', self.answer.id]))
+        anonymous = Client()
+        self.assertEqual(anonymous.get(reverse('question_list'))['X-Page-Cache'], 'hit')
+        response = anonymous.get(reverse('question_detail', args=[self.question_id]))
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_question_vote_and_ask_invalidate_lists(self):
+        self._get_twice(reverse('question_list'))
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('vote_up', args=['question', self.question_id]))
+        self._get_twice(reverse('question_list'))
+        c.post(reverse('ask_question'), {'label': 'new question', 'text': 'text', 'tags': ''})
+        response = self._get_twice(reverse('question_list'))
+        self.assertContains(response, 'new question')
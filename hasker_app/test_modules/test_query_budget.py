@@ -0,0 +1,162 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from hasker_app import side_panel, urls
+from hasker_app.models import UserReq, Tag, Question, Answer
+from hasker_app.test_modules.helpers import QueryBudgetMixin, memory_sessions_cache
+
+# views of django.contrib.auth
+NOT_OWN_VIEWS = {'login', 'logout'}
+# views which need logged in user
+LOGIN_VIEWS = {'vote_up', 'vote_down', 'vote_json', 'post_answer', 'ask_question', 'edit_account'}
+
+
+@memory_sessions_cache
+class TestQueryBudget(QueryBudgetMixin, TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.tag = Tag.objects.create(name='test_tag')
+        # side panel hit counters are written in batches, not inside measured requests
+        side_panel._flush_counters()
+        self.questions = []
+        for x in range(12):
+            question = Question.objects.create(label=f'test_question_{x}', text='test text', user=user.user_req)
+            question.tags.add(self.tag)
+            self.questions.append(question)
+
+    def _requests(self):
+        question = self.questions[0]
+        answer = Answer.objects.filter(question=question).first()
+        return [
+            ('get', reverse('question_list'), None),
+            ('get', reverse('question_list_date_ordered'), None),
+            ('get', reverse('question_search') + '?search_tag=test_tag', None),
+            ('get', reverse('question_search') + '?search_str=text', None),
+            ('get', reverse('question_detail', args=[question.id]), None),
+            ('get', reverse('question_answers', args=[question.id]), None),
+            ('get', reverse('vote_up', args=['answer', answer.id]), None),
+            ('get', reverse('vote_down', args=['question', question.id]), None),
+            ('post', reverse('vote_json', args=['question', question.id]), {'direction': 'up'}),
+            ('post', reverse('post_answer', args=[question.id]), {'text': 'test answer'}),
+            ('get', reverse('ask_question'), None),
+            ('post', reverse('ask_question'), {'label': 'label', 'text': 'text', 'tags': 'test_tag, a, b'}),
+            ('get', reverse('tag_autocomplete') + '?q=te', None),
+            ('get', reverse('tag_list'), None),
+            ('get', reverse('user_profile', args=[self.login_data['username']]), None),
+            ('get', reverse('question_feed', args=['rss']), None),
+            ('get', reverse('tag_question_feed', args=['test_tag', 'json']), None),
+            ('get', reverse('register'), None),
+            ('get', reverse('edit_account'), None),
+            ('post', reverse('edit_account'), {'email': 'new@email.email'}),
+        ]
+
+    def _check(self, client, answers, anonymous=False):
+        for x in range(answers):
+            Answer.objects.create(text='answer', question=self.questions[0], user=UserReq.objects.first())
+        for method, url, data in self._requests():
+            if anonymous and (method != 'get' or resolve(url.split('?')[0]).url_name in LOGIN_VIEWS):
+                continue
+            for alias in settings.CACHES:
+                caches[alias].clear()
+            response = getattr(client, method)(url, data or {})
+            self.assertLess(response.status_code, 400, url)
+            self.assertWithinBudget(response, cold=True)
+            response = getattr(client, method)(url, data or {})
+            self.assertWithinBudget(response)
+
+    def test_authenticated(self):
+        c = Client()
+        c.login(**self.login_data)
+        for answers in (1, 10):
+            self._check(c, answers)
+
+    def test_anonymous(self):
+        for answers in (1, 10):
+            self._check(Client(), answers, anonymous=True)
+
+    def test_register(self):
+        response = Client().post(reverse('register'), {
+            'username': 'test_register',
+            'first_name': 'test_register_name',
+            'email': 'mail@mail.mail',
+            'password1': 'zaXScdVF123',
+            'password2': 'zaXScdVF123'
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertWithinBudget(response)
+
+    def test_every_view_has_budget(self):
+        for pattern in urls.urlpatterns:
+            if pattern.name not in NOT_OWN_VIEWS:
+                self.assertViewHasBudget(pattern.callback)
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(username='test_1', password='test_password')
+        UserReq.objects.create(user=user, avatar='../static/hasker_app/default_avatar.jpg')
+        Question.objects.create(label='test_question', text='test text', user=user.user_req)
+
+    @override_settings(SERVER_TIMING=True, PAGE_CACHE_TTL=0)
+    def test_server_timing(self):
+        response = Client().get(reverse('question_list'))
+        timing = response['Server-Timing']
+        self.assertIn(f'db;desc="{response.metrics.query_count} queries";dur=', timing)
+        for name in ('tpl', 'view', 'total'):
+            self.assertIn(f'{name};dur=', timing)
+        self.assertGreater(response.metrics.template_time, 0)
+        self.assertEqual(response.metrics.view_name, 'question_list')
+
+    @override_settings(SERVER_TIMING=False)
+    def test_no_server_timing(self):
+        response = Client().get(reverse('question_list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertIsNotNone(response.metrics.total_time)
+
+    @override_settings(SLOW_REQUEST_QUERIES=0, PAGE_CACHE_TTL=0)
+    def test_slow_request_logged(self):
+        with self.assertLogs('hasker_app.instrumentation', logging.WARNING) as logs:
+            Client().get(reverse('question_list'))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('GET / (question_list)', logs.output[0])
+        self.assertNotIn('SELECT', logs.output[0])
+
+    @override_settings(SLOW_REQUEST_QUERIES=0, PAGE_CACHE_TTL=0)
+    def test_slow_request_sql_logged_at_debug(self):
+        with self.assertLogs('hasker_app.instrumentation', logging.DEBUG) as logs:
+            Client().get(reverse('question_list'))
+        self.assertEqual(logs.records[1].levelno, logging.DEBUG)
+        self.assertIn('SELECT', logs.output[1])
+
+    @override_settings(PAGE_CACHE_TTL=0)
+    def test_cold_request_within_cold_budget_not_logged(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('hasker_app.instrumentation', logging.WARNING):
+                response = Client().get(reverse('question_list'))
+        self.assertGreater(response.metrics.query_count, response.metrics.query_budget)
+
+    @override_settings(CONCURRENT_QUERY_WORKERS=0, PAGE_CACHE_TTL=0)
+    def test_fast_request_not_logged(self):
+        c = Client()
+        c.get(reverse('question_list'))
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('hasker_app.instrumentation', logging.WARNING):
+                c.get(reverse('question_list'))
@@ -1,8 +1,10 @@
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.test import TestCase, Client
 from django.urls import reverse
 
 from hasker_app.models import UserReq, Question, Tag
+from hasker_app.tag_index import tag_index
 
 
 class TestQuestionAsk(TestCase):
@@ -52,7 +54,34 @@ class TestQuestionAsk(TestCase):
         c.login(**self.login_data)
         response = c.get(reverse('ask_question'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context['tags_list'], ['test_tag'])
+        self.assertNotIn('tags_list', response.context)
+        self.assertContains(response, reverse('tag_autocomplete'))
+
+    def test_tag_autocomplete(self):
+        tag_index.clear()
+        question = Question.objects.get()
+        for name in ('Python', 'pytest', 'pypy', 'django'):
+            Tag.objects.create(name=name)
+        question.tags.add(Tag.objects.get(name='pypy'))
+        c = Client()
+        response = c.get(reverse('tag_autocomplete'), {'q': 'PY'})
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json()['tags'], ['pypy', 'pytest', 'python'])
+        response = c.get(reverse('tag_autocomplete'), {'q': 'py', 'limit': 1})
+        self.assertListEqual(response.json()['tags'], ['pypy'])
+        response = c.get(reverse('tag_autocomplete'), {'q': 'x'})
+        self.assertListEqual(response.json()['tags'], [])
+
+    def test_tag_autocomplete_incremental(self):
+        tag_index.clear()
+        c = Client()
+        response = c.get(reverse('tag_autocomplete'), {'q': 'new'})
+        self.assertListEqual(response.json()['tags'], [])
+        c.login(**self.login_data)
+        c.post(reverse('ask_question'), {'label': 'question', 'text': 'text', 'tags': 'new_tag'})
+        c.post(reverse('ask_question'), {'label': 'question', 'text': 'text', 'tags': 'new_tag,newer_tag'})
+        response = c.get(reverse('tag_autocomplete'), {'q': 'new'})
+        self.assertListEqual(response.json()['tags'], ['new_tag', 'newer_tag'])
 
     def test_question_ask(self):
         c = Client()
@@ -137,6 +166,24 @@ class TestQuestionAsk(TestCase):
         question = Question.objects.get(label='test question creation')
         self.assertEqual(len(question.tags.all()), 2)
 
+    def test_question_ask_normalized_tags(self):
+        c = Client()
+        c.login(**self.login_data)
+        question_data = {
+            'label': 'test question creation',
+            'text': 'text',
+            'tags': ' Test_Tag , test_tag, New_Tag'
+        }
+        response = c.post(reverse('ask_question'), question_data)
+        self.assertEqual(response.status_code, 302)
+        question = Question.objects.get(label='test question creation')
+        self.assertSetEqual({x.name for x in question.tags.all()}, {'test_tag', 'new_tag'})
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_tag_name_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Tag.objects.create(name='TEST_TAG ')
+
     def test_question_anon_ask(self):
         c = Client()
         question_data = {
@@ -0,0 +1,123 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hasker_app import side_panel
+from hasker_app.models import UserReq, Tag, Question
+from hasker_app.test_modules.helpers import memory_sessions_cache
+
+
+@memory_sessions_cache
+class TestQuestionListQueries(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+    # side panel cache, cached count, page, tags (session, user and profile are cached)
+    max_queries = {
+        'anonymous': 4,
+        'authenticated': 4,
+    }
+    urls = [
+        reverse('question_list'),
+        reverse('question_list_date_ordered'),
+        reverse('question_search') + '?search_tag=test_tag',
+        reverse('question_search') + '?search_str=text',
+    ]
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.user_req = user.user_req
+        self.tag = Tag.objects.create(name='test_tag')
+        self.tag2 = Tag.objects.create(name='test_tag_2')
+        # side panel hit counters are written in batches, not inside measured requests
+        side_panel._flush_counters()
+
+    def _create_questions(self, count):
+        for x in range(count):
+            question = Question.objects.create(
+                label=f'test_question_{x}',
+                text='test text',
+                user=self.user_req
+            )
+            question.tags.add(self.tag, self.tag2)
+
+    def _count_queries(self, client, url):
+        # warm side panel cache, it is not a part of per-page budget
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def _check_budget(self, client, kind):
+        # budget doesn't depend on number of rows on page: 1, 2 and full page
+        for count in (1, 1, 10):
+            self._create_questions(count)
+            for url in self.urls:
+                self.assertLessEqual(self._count_queries(client, url), self.max_queries[kind], url)
+
+    def test_anonymous_query_budget(self):
+        self._check_budget(Client(), 'anonymous')
+
+    def test_authenticated_query_budget(self):
+        c = Client()
+        c.login(**self.login_data)
+        self._check_budget(c, 'authenticated')
+
+    def test_text_is_not_loaded(self):
+        self._create_questions(1)
+        with CaptureQueriesContext(connection) as queries:
+            Client().get(reverse('question_list'))
+        question_queries = [x['sql'] for x in queries.captured_queries if 'FROM "hasker_app_question"' in x['sql']]
+        self.assertTrue(question_queries)
+        for sql in question_queries:
+            self.assertNotIn('"hasker_app_question"."text"', sql)
+
+
+class TestQuestionListFragments(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.question = Question.objects.create(
+            label='test_question',
+            text='test text',
+            user=user.user_req
+        )
+
+    def test_row_fragment_reused(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('question_list'))
+        # change without new version stamp is not visible: row is taken from fragment cache
+        Question.objects.filter(id=self.question.id).update(label='changed_label')
+        response = c.get(reverse('question_list_date_ordered'))
+        self.assertContains(response, 'test_question')
+        self.assertNotContains(response, 'changed_label')
+
+    def test_row_fragment_invalidated(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('question_list'))
+        Question.objects.filter(id=self.question.id).update(label='changed_label')
+        c.get(reverse('vote_up', args=['question', self.question.id]))
+        response = c.get(reverse('question_list'))
+        self.assertContains(response, 'changed_label')
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
 from django.test import Client, TestCase
@@ -108,3 +110,109 @@ class TestQuestionView(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(len(UserRate.objects.all()), 1)
         self.assertEqual(UserRate.objects.all()[0].rate, 0)
+
+    def test_question_vote_json(self):
+        c = Client()
+        c.login(**self.login_data)
+        response = c.post(reverse('vote_json', args=['question', self.question_id]), {'direction': 'up'})
+        self.assertEqual(response.status_code, 200)
+        self.assertDictEqual(response.json(), {'rating': 1, 'vote': 1})
+        response = c.post(reverse('vote_json', args=['question', self.question_id]), {'direction': 'up'})
+        self.assertDictEqual(response.json(), {'rating': 1, 'vote': 1})
+        response = c.post(reverse('vote_json', args=['question', self.question_id]), {'direction': 'down'})
+        self.assertDictEqual(response.json(), {'rating': 0, 'vote': 0})
+        self.assertEqual(len(UserRate.objects.all()), 1)
+
+    def test_question_vote_json_wrong_direction(self):
+        c = Client()
+        c.login(**self.login_data)
+        response = c.post(reverse('vote_json', args=['question', self.question_id]), {'direction': 'left'})
+        self.assertEqual(response.status_code, 400)
+        response = c.get(reverse('vote_json', args=['question', self.question_id]), {'direction': 'up'})
+        self.assertEqual(response.status_code, 405)
+
+    def test_question_anon_vote_json(self):
+        c = Client()
+        response = c.post(reverse('vote_json', args=['question', self.question_id]), {'direction': 'up'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(UserRate.objects.all()), 0)
+
+    def test_question_vote_nonexists(self):
+        c = Client()
+        c.login(**self.login_data)
+        response = c.get(reverse('vote_up', args=['question', 0]))
+        self.assertEqual(response.status_code, 404)
+        response = c.get(reverse('vote_up', args=['answer', 0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_question_rate_unique(self):
+        user_req = UserReq.objects.get()
+        UserRate.objects.create(user=user_req, question_id=self.question_id, rate=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserRate.objects.create(user=user_req, question_id=self.question_id, rate=1)
+
+
+class TestQuestionETag(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        for name in ('test_1', 'test_2'):
+            user = User.objects.create_user(username=name, password='test_password')
+            UserReq.objects.create(user=user, avatar='../static/hasker_app/default_avatar.jpg')
+        question = Question.objects.create(label='test_question', text='test text', user=UserReq.objects.first())
+        self.url = reverse('question_detail', args=[question.id])
+        self.question_id = question.id
+
+    def test_anonymous_not_modified(self):
+        c = Client()
+        response = c.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        # version of question from cache only
+        with self.assertNumQueries(1):
+            response = c.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_by_answer_and_vote(self):
+        c = Client()
+        c.login(**self.login_data)
+        etag = c.get(self.url)['ETag']
+        self.assertEqual(c.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        c.post(reverse('post_answer', args=[self.question_id]), {'text': 'test answer'})
+        response = c.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'test answer')
+        self.assertIn('private', response['Cache-Control'])
+
+        etag = response['ETag']
+        c.get(reverse('vote_up', args=['question', self.question_id]))
+        self.assertEqual(c.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_differs_by_user(self):
+        anonymous = Client().get(self.url)['ETag']
+        etags = {anonymous}
+        for name in ('test_1', 'test_2'):
+            c = Client()
+            c.login(username=name, password='test_password')
+            etags.add(c.get(self.url)['ETag'])
+            self.assertEqual(c.get(self.url, HTTP_IF_NONE_MATCH=anonymous).status_code, 200)
+        self.assertEqual(len(etags), 3)
+
+    def test_differs_by_csrf_token(self):
+        c = Client(enforce_csrf_checks=True)
+        c.login(**self.login_data)
+        # token of the first page is sent back in cookie
+        etag = c.get(self.url)['ETag']
+        self.assertEqual(c.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # new token (lost cookie, rotation on login): kept page would post answer with the old one
+        del c.cookies[settings.CSRF_COOKIE_NAME]
+        response = c.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = c.post(
+            reverse('post_answer', args=[self.question_id]),
+            {'text': 'test answer', 'csrfmiddlewaretoken': str(response.context['csrf_token'])}
+        )
+        self.assertEqual(response.status_code, 302)
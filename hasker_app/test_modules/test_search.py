@@ -1,10 +1,15 @@
+import base64
+import json
+from io import StringIO
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.db.models import Sum, Q
 from django.db.models.functions import Coalesce
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from hasker_app.models import UserReq, Tag, Question, UserRate
+from hasker_app.models import UserReq, Tag, Question, UserRate, Answer
 
 
 class TestSearch(TestCase):
@@ -44,6 +49,7 @@ class TestSearch(TestCase):
                     question=question,
                     rate=x
                 )
+        call_command('rebuild_counters', stdout=StringIO())
 
     def test_get_list(self):
         c = Client()
@@ -94,32 +100,21 @@ class TestSearch(TestCase):
 
     def test_get_list_search_label(self):
         c = Client()
-        response = c.get(reverse('question_search') + '?search_str=question_1')
+        response = c.get(reverse('question_search') + '?search_str=3')
         self.assertEqual(response.status_code, 200)
+        # label match is ranked above text match of question with higher rating
         self.assertListEqual(
-            response.context['object_list'][0:5],
-            list(
-                Question
-                .objects
-                .annotate(rate=Coalesce(Sum('rates__rate'), 0))
-                .filter(label__contains='question_1')
-                .order_by('-rate', '-created_date')[0:5]
-            )
+            [x.label for x in response.context['object_list']],
+            ['test_question_3', 'test_question_4']
         )
 
     def test_get_list_search_text(self):
         c = Client()
-        response = c.get(reverse('question_search') + '?search_str=text 1')
+        response = c.get(reverse('question_search') + '?search_str=text 17')
         self.assertEqual(response.status_code, 200)
-        self.assertListEqual(
-            response.context['object_list'][0:5],
-            list(
-                Question
-                .objects
-                .annotate(rate=Coalesce(Sum('rates__rate'), 0))
-                .filter(text__contains='text 1')
-                .order_by('-rate', '-created_date')[0:5]
-            )
+        self.assertSetEqual(
+            set(response.context['object_list']),
+            set(Question.objects.filter(Q(text='test text 17') | Q(label='test_question_17')))
         )
 
     def test_get_list_search_text_and_label(self):
@@ -127,16 +122,34 @@ class TestSearch(TestCase):
         response = c.get(reverse('question_search') + '?search_str=15')
         self.assertEqual(response.status_code, 200)
         self.assertListEqual(
-            response.context['object_list'][0:5],
-            list(
-                Question
-                .objects
-                .annotate(rate=Coalesce(Sum('rates__rate'), 0))
-                .filter(Q(text='test text 15') | Q(label='test_question_15'))
-                .order_by('-rate', '-created_date')[0:5]
-            )
+            list(response.context['object_list']),
+            [Question.objects.get(label='test_question_15'), Question.objects.get(text='test text 15')]
         )
 
+    def test_get_list_search_answer(self):
+        question = Question.objects.get(label='test_question_7')
+        Answer.objects.create(text='pancake recipe', question=question, user=question.user)
+        c = Client()
+        response = c.get(reverse('question_search') + '?search_str=pancake')
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(list(response.context['object_list']), [question])
+
+    def test_get_list_search_updated_question(self):
+        question = Question.objects.get(label='test_question_7')
+        question.text = 'waffle'
+        question.save()
+        c = Client()
+        response = c.get(reverse('question_search') + '?search_str=waffle')
+        self.assertListEqual(list(response.context['object_list']), [question])
+        response = c.get(reverse('question_search') + '?search_str=6')
+        self.assertNotIn(question, response.context['object_list'])
+
+    def test_get_list_search_empty(self):
+        c = Client()
+        response = c.get(reverse('question_search') + '?search_str=')
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(list(response.context['object_list']), [])
+
     def test_get_list_search_tag(self):
         c = Client()
         response = c.get(reverse('question_search') + '?search_tag=test_tag_2')
@@ -150,4 +163,70 @@ class TestSearch(TestCase):
                 .filter(tags__name='test_tag_2')
                 .order_by('-rate', '-created_date')[0:5]
             )
-        )
\ No newline at end of file
+        )
+    def _walk_cursor_pages(self, url):
+        c = Client()
+        response = c.get(url)
+        pages = [list(response.context['object_list'])]
+        while response.context['page_obj'].has_next():
+            delim = '&' if '?' in url else '?'
+            response = c.get(f"{url}{delim}cursor={response.context['page_obj'].next_cursor}")
+            self.assertEqual(response.status_code, 200)
+            pages.append(list(response.context['object_list']))
+        return c, response, pages
+
+    def test_cursor_pages(self):
+        c, response, pages = self._walk_cursor_pages(reverse('question_list'))
+        self.assertEqual(len(pages), 2)
+        self.assertListEqual(
+            pages[0] + pages[1],
+            list(Question.objects.order_by('-rating', '-created_date', '-id'))
+        )
+        response = c.get(reverse('question_list'), {'cursor': response.context['page_obj'].previous_cursor})
+        self.assertListEqual(list(response.context['object_list']), pages[0])
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_cursor_pages_date_ordered(self):
+        _, _, pages = self._walk_cursor_pages(reverse('question_list_date_ordered'))
+        self.assertListEqual(
+            pages[0] + pages[1],
+            list(Question.objects.order_by('-created_date', '-rating', '-id'))
+        )
+
+    def test_cursor_pages_search(self):
+        _, _, pages = self._walk_cursor_pages(reverse('question_search') + '?search_str=text')
+        questions = pages[0] + pages[1]
+        self.assertEqual(len(questions), 20)
+        self.assertSetEqual(set(questions), set(Question.objects.all()))
+
+    def test_cursor_link(self):
+        c = Client()
+        response = c.get(reverse('question_list'))
+        self.assertContains(response, f"?cursor={response.context['page_obj'].next_cursor}")
+        self.assertContains(response, '20 questions')
+
+    def test_invalid_cursor(self):
+        c = Client()
+        response = c.get(reverse('question_list') + '?cursor=abc')
+        self.assertEqual(response.status_code, 404)
+
+    def test_crafted_cursor(self):
+        def cursor(values):
+            return base64.urlsafe_b64encode(json.dumps([False, values]).encode()).decode()
+
+        created = Question.objects.first().created_date.isoformat()
+        urls = [
+            # rating, created_date, id
+            reverse('question_list') + '?cursor=' + cursor([1, ['2020-01-01'], 1]),
+            reverse('question_list') + '?cursor=' + cursor([None, created, 1]),
+            reverse('question_list') + '?cursor=' + cursor([1, created, 'x']),
+            reverse('question_list') + '?cursor=' + cursor([1, created, 10 ** 30]),
+            reverse('question_list') + '?cursor=' + cursor([1, created]),
+            # search_rank, rating, created_date, id
+            reverse('question_search') + '?search_str=text&cursor=' + cursor(['x', 1, created, 1]),
+            reverse('question_search') + '?search_str=text&cursor=' + cursor([{}, 1, created, 1]),
+        ]
+        for url in urls:
+            self.assertEqual(Client().get(url).status_code, 404, url)
+        response = Client().get(reverse('question_search') + '?search_str=text&cursor=' + cursor(['1', 1, created, 1]))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from hasker_app import side_panel
+from hasker_app.models import Counter, UserReq, Question
+
+
+@override_settings(SIDE_PANEL_BACKGROUND_REFRESH=False, PAGE_CACHE_TTL=0)
+class TestSidePanel(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        for x in range(15):
+            Question.objects.create(
+                label=f'test_question_{x}',
+                text='test text',
+                user=user.user_req,
+                rating=x
+            )
+        self.initial_stats = side_panel.stats()
+
+    def _stats(self):
+        stats = side_panel.stats()
+        return {key: value - self.initial_stats[key] for key, value in stats.items()}
+
+    def test_hit_and_miss(self):
+        c = Client()
+        c.get(reverse('question_list'))
+        c.get(reverse('question_list_date_ordered'))
+        self.assertEqual(self._stats(), {'hits': 1, 'misses': 1})
+
+    def test_side_questions(self):
+        c = Client()
+        response = c.get(reverse('question_list'))
+        self.assertListEqual(
+            [x['id'] for x in response.context['side_questions']],
+            list(Question.objects.order_by('-rating', '-created_date').values_list('id', flat=True)[0:10])
+        )
+
+    def test_vote_outside_top_keeps_cache(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('question_list'))
+        question = Question.objects.get(label='test_question_0')
+        c.get(reverse('vote_up', args=['question', question.id]))
+        c.get(reverse('question_list'))
+        self.assertEqual(self._stats(), {'hits': 1, 'misses': 1})
+
+    def test_vote_into_top_drops_cache(self):
+        c = Client()
+        c.login(**self.login_data)
+        Question.objects.filter(label='test_question_4').update(rating=5)
+        c.get(reverse('question_list'))
+        question = Question.objects.get(label='test_question_4')
+        c.get(reverse('vote_up', args=['question', question.id]))
+        response = c.get(reverse('question_list'))
+        self.assertEqual(self._stats(), {'hits': 0, 'misses': 2})
+        self.assertIn(question.id, [x['id'] for x in response.context['side_questions']])
+
+    def test_new_question_drops_cache_if_can_get_to_top(self):
+        Question.objects.update(rating=-1)
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('question_list'))
+        c.post(reverse('ask_question'), {'label': 'new question', 'text': 'text', 'tags': ''})
+        response = c.get(reverse('question_list'))
+        self.assertEqual(response.context['side_questions'][0]['label'], 'new question')
+
+    def test_stale_value_is_refreshed(self):
+        c = Client()
+        c.get(reverse('question_list'))
+        entry = cache.get(side_panel.CACHE_KEY)
+        entry['fresh_until'] = 0
+        entry['questions'] = []
+        cache.set(side_panel.CACHE_KEY, entry)
+        response = c.get(reverse('question_list'))
+        self.assertListEqual(list(response.context['side_questions']), [])
+        response = c.get(reverse('question_list'))
+        self.assertEqual(len(response.context['side_questions']), 10)
+
+    def test_counters_flush_increments(self):
+        side_panel._flush_counters()
+        Counter.objects.update_or_create(name=side_panel.HITS_KEY, defaults={'value': 5})
+        Counter.objects.filter(name=side_panel.MISSES_KEY).delete()
+        for x in range(3):
+            side_panel._count(side_panel.HITS_KEY)
+        side_panel._count(side_panel.MISSES_KEY)
+        # flush of another process after this one read its counters
+        Counter.objects.filter(name=side_panel.HITS_KEY).update(value=F('value') + 2)
+        side_panel._flush_counters()
+        self.assertEqual(Counter.objects.get(name=side_panel.HITS_KEY).value, 10)
+        self.assertEqual(Counter.objects.get(name=side_panel.MISSES_KEY).value, 1)
+        self.assertEqual(side_panel.stats(), {'hits': 10, 'misses': 1})
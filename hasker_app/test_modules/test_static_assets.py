@@ -0,0 +1,166 @@
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from hasker_app.static_assets import StaticAssetsApplication, StaticAssetsAsgiApplication, accepted_encodings
+
+
+class TestStaticAssets(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(STATIC_ROOT=cls.static_root)
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0, stdout=StringIO())
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as f:
+            cls.paths = json.load(f)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.app = StaticAssetsApplication(self._django, self.static_root, '/static/')
+
+    @staticmethod
+    def _django(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'django']
+
+    def _request(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method}
+        environ.update(headers)
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        result['body'] = b''.join(self.app(environ, start_response))
+        return result
+
+    def test_fingerprinted_and_precompressed(self):
+        hashed = self.paths['hasker_app/vote.js']
+        self.assertNotEqual(hashed, 'hasker_app/vote.js')
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, hashed + '.gz')))
+        self.assertEqual(static('hasker_app/vote.js'), '/static/' + hashed)
+
+    def test_hashed_file_immutable(self):
+        response = self._request('/static/' + self.paths['hasker_app/vote.js'])
+        self.assertEqual(response['status'], '200 OK')
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Encoding', response['headers'])
+        with open(os.path.join(self.static_root, 'hasker_app', 'vote.js'), 'rb') as f:
+            self.assertEqual(response['body'], f.read())
+
+    def test_original_name_short_cache(self):
+        response = self._request('/static/hasker_app/vote.js')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertNotIn('immutable', response['headers']['Cache-Control'])
+
+    def test_gzip_negotiation(self):
+        path = '/static/' + self.paths['hasker_app/jquery-3.5.1.min.js']
+        response = self._request(path, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['headers']['Content-Length']), len(response['body']))
+        identity = self._request(path, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', identity['headers'])
+        self.assertEqual(gzip.decompress(response['body']), identity['body'])
+
+    def test_large_file_mmapped(self):
+        app = StaticAssetsApplication(self._django, self.static_root, '/static/', memory_limit=1024)
+        name = self.paths['hasker_app/jquery-3.5.1.min.js']
+        self.assertNotIsInstance(app.assets[name].variants['identity'], bytes)
+        self.app = app
+        response = self._request('/static/' + name)
+        with open(os.path.join(self.static_root, name), 'rb') as f:
+            self.assertEqual(response['body'], f.read())
+
+    def test_not_modified(self):
+        path = '/static/' + self.paths['hasker_app/style.css']
+        etag = self._request(path)['headers']['ETag']
+        response = self._request(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['status'], '304 Not Modified')
+        self.assertEqual(response['body'], b'')
+
+    def test_etag_per_encoding(self):
+        path = '/static/' + self.paths['hasker_app/jquery-3.5.1.min.js']
+        gzipped = self._request(path, HTTP_ACCEPT_ENCODING='gzip')['headers']['ETag']
+        identity = self._request(path)['headers']['ETag']
+        self.assertNotEqual(gzipped, identity)
+        # validator of gzip body doesn't match identity one
+        self.assertEqual(self._request(path, HTTP_IF_NONE_MATCH=gzipped)['status'], '200 OK')
+        response = self._request(path, HTTP_IF_NONE_MATCH=f'"other", {gzipped}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['status'], '304 Not Modified')
+
+    def test_head(self):
+        response = self._request('/static/' + self.paths['hasker_app/style.css'], method='HEAD')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['body'], b'')
+        self.assertNotEqual(response['headers']['Content-Length'], '0')
+
+    def test_other_requests_go_to_django(self):
+        for path, method in [
+            ('/static/hasker_app/missing.js', 'GET'),
+            ('/static/../hasker/settings.py', 'GET'),
+            ('/static/hasker_app/vote.js', 'POST'),
+            ('/question/1/', 'GET'),
+        ]:
+            self.assertEqual(self._request(path, method=method)['body'], b'django')
+
+    def test_without_manifest(self):
+        empty_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, empty_root)
+        app = StaticAssetsApplication(self._django, empty_root, '/static/')
+        self.assertEqual(app.assets, {})
+        with override_settings(STATIC_ROOT=empty_root):
+            # not built yet: original names are used
+            self.assertEqual(staticfiles_storage.stored_name('hasker_app/vote.js'), 'hasker_app/vote.js')
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('br;q=1.0, gzip;q=0.5, *;q=0'), {'br', 'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
+
+    def test_asgi(self):
+        async def django(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b'django'})
+
+        app = StaticAssetsAsgiApplication(django, self.static_root, '/static/')
+
+        def request(path, **headers):
+            scope = {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'headers': [(name.encode(), value.encode()) for name, value in headers.items()],
+            }
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            asyncio.run(app(scope, None, send))
+            return messages[0], b''.join(x.get('body', b'') for x in messages[1:])
+
+        path = '/static/' + self.paths['hasker_app/jquery-3.5.1.min.js']
+        start, body = request(path, **{'accept-encoding': 'gzip'})
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-encoding', b'gzip'), [(name.lower(), value) for name, value in start['headers']])
+        self.assertEqual(body, self._request(path, HTTP_ACCEPT_ENCODING='gzip')['body'])
+        etag = dict(start['headers'])[b'ETag'].decode()
+        self.assertEqual(request(path, **{'if-none-match': etag, 'accept-encoding': 'gzip'})[0]['status'], 304)
+        self.assertEqual(request('/question/1/')[1], b'django')
@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hasker_app.models import UserReq, Tag, Question
+
+
+class TestTagQuestionCount(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.user_req = user.user_req
+        self.tag = Tag.objects.create(name='test_tag')
+        self.tag2 = Tag.objects.create(name='test_tag_2')
+
+    def _counts(self):
+        return dict(Tag.objects.values_list('name', 'question_count'))
+
+    def _question(self, *tags):
+        question = Question.objects.create(label='test_question', text='test text', user=self.user_req)
+        question.tags.add(*tags)
+        return question
+
+    def test_ask_question(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.post(reverse('ask_question'), {'label': 'q1', 'text': 'text', 'tags': 'test_tag, new_tag'})
+        c.post(reverse('ask_question'), {'label': 'q2', 'text': 'text', 'tags': 'test_tag'})
+        self.assertEqual(self._counts(), {'test_tag': 2, 'test_tag_2': 0, 'new_tag': 1})
+
+    def test_add_remove_clear(self):
+        question = self._question(self.tag, self.tag2)
+        # already added tag is not counted again
+        question.tags.add(self.tag)
+        self.assertEqual(self._counts(), {'test_tag': 1, 'test_tag_2': 1})
+        question.tags.remove(self.tag)
+        question.tags.remove(self.tag)
+        self.assertEqual(self._counts(), {'test_tag': 0, 'test_tag_2': 1})
+        question.tags.set([self.tag])
+        self.assertEqual(self._counts(), {'test_tag': 1, 'test_tag_2': 0})
+        question.tags.clear()
+        self.assertEqual(self._counts(), {'test_tag': 0, 'test_tag_2': 0})
+
+    def test_reverse_changes(self):
+        question = self._question()
+        other = self._question()
+        self.tag.question_set.add(question, other)
+        self.assertEqual(self._counts()['test_tag'], 2)
+        self.tag.question_set.remove(question)
+        self.assertEqual(self._counts()['test_tag'], 1)
+        self.tag.question_set.clear()
+        self.assertEqual(self._counts()['test_tag'], 0)
+
+    def test_question_delete(self):
+        self._question(self.tag, self.tag2).delete()
+        self._question(self.tag)
+        self.assertEqual(self._counts(), {'test_tag': 1, 'test_tag_2': 0})
+
+    def test_rebuild_counters(self):
+        self._question(self.tag, self.tag2)
+        Tag.objects.update(question_count=10)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self._counts(), {'test_tag': 1, 'test_tag_2': 1})
+
+
+@override_settings(PAGE_CACHE_TTL=0)
+class TestTagList(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(username='test_1', password='test_password')
+        UserReq.objects.create(user=user, avatar='../static/hasker_app/default_avatar.jpg')
+        self.user_req = user.user_req
+        for x, count in enumerate([1, 5, 20, 0]):
+            tag = Tag.objects.create(name=f'tag_{x}')
+            for _ in range(count):
+                Question.objects.create(label='q', text='t', user=self.user_req).tags.add(tag)
+
+    def test_ordered_by_popularity(self):
+        response = Client().get(reverse('tag_list'))
+        self.assertEqual(response.status_code, 200)
+        tags = response.context['object_list']
+        self.assertEqual([x.name for x in tags], ['tag_2', 'tag_1', 'tag_0'])
+        self.assertEqual([x.cloud_size for x in tags], [5, 3, 2])
+        self.assertContains(response, 'search_tag=tag_2')
+
+    def test_served_from_counters(self):
+        c = Client()
+        c.get(reverse('tag_list'))
+        with CaptureQueriesContext(connection) as queries:
+            c.get(reverse('tag_list'))
+        for query in queries.captured_queries:
+            self.assertNotIn('hasker_app_question_tags', query['sql'])
+
+    def test_pagination(self):
+        for x in range(150):
+            Tag.objects.create(name=f'other_{x:03}', question_count=1)
+        response = Client().get(reverse('tag_list'))
+        self.assertEqual(len(response.context['object_list']), 100)
+        self.assertContains(response, '?page=2')
+        response = Client().get(reverse('tag_list') + '?page=2')
+        self.assertEqual(len(response.context['object_list']), 53)
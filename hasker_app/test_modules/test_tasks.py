@@ -0,0 +1,173 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hasker_app import tasks
+from hasker_app.models import Question, Task, UserReq
+
+
+class TestTasks(TestCase):
+    login_data = {'username': 'test_2', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        self.users = []
+        for x in range(1, 3):
+            user = User.objects.create_user(
+                username=f'test_{x}',
+                first_name=f'test_first_name_{x}',
+                email=f'test_email_{x}@email.email',
+                password='test_password'
+            )
+            self.users.append(UserReq.objects.create(
+                user=user,
+                avatar='../static/hasker_app/default_avatar.jpg'
+            ))
+        self.questions = [
+            Question.objects.create(label=f'test_question_{x}', text='test text', user=self.users[0])
+            for x in range(2)
+        ]
+
+    def _answer(self, client, question, text='test answer'):
+        response = client.post(reverse('post_answer', args=[question.id]), {'text': text})
+        self.assertEqual(response.status_code, 302)
+
+    def test_answer_notification(self):
+        c = Client()
+        c.login(**self.login_data)
+        self._answer(c, self.questions[0])
+        # nothing is sent in request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.filter(name='notify_answers').count(), 1)
+
+        self.assertEqual(tasks.run_batch(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test_email_1@email.email'])
+        self.assertIn('test_question_0', mail.outbox[0].subject)
+        self.assertIn(reverse('question_detail', args=[self.questions[0].id]), mail.outbox[0].body)
+        self.assertIn('test_2 answered', mail.outbox[0].body)
+        self.assertFalse(Task.objects.exists())
+
+    def test_answers_batched_per_author(self):
+        c = Client()
+        c.login(**self.login_data)
+        for question in self.questions:
+            self._answer(c, question, f'answer to {question.label}')
+        tasks.run_batch()
+        self.assertEqual(len(mail.outbox), 1)
+        for question in self.questions:
+            self.assertIn(f'answer to {question.label}', mail.outbox[0].body)
+
+    def test_no_notification(self):
+        c = Client()
+        c.login(username='test_1', password='test_password')
+        self._answer(c, self.questions[0])
+        self.users[1].user.email = ''
+        self.users[1].user.save()
+        question = Question.objects.create(label='question_without_email', text='text', user=self.users[1])
+        self._answer(c, question)
+        self.assertEqual(tasks.run_batch(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(Task.objects.exists())
+
+    def test_not_due(self):
+        tasks.enqueue('notify_answers', run_at=timezone.now() + timedelta(minutes=1), answer_id=0)
+        self.assertEqual(tasks.run_batch(), 0)
+
+    def test_batch_size(self):
+        for x in range(3):
+            tasks.enqueue('test_task', number=x)
+        handler = mock.Mock()
+        with mock.patch.dict(tasks.HANDLERS, {'test_task': handler}):
+            self.assertEqual(tasks.run_batch(2), 2)
+            handler.assert_called_once_with([{'number': 0}, {'number': 1}])
+            self.assertEqual(tasks.run_batch(2), 1)
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=10)
+    def test_retry_with_backoff(self):
+        task = tasks.enqueue('test_task')
+        handler = mock.Mock(side_effect=ValueError('test error'))
+        with mock.patch.dict(tasks.HANDLERS, {'test_task': handler}), self.assertLogs('hasker_app.tasks'):
+            start = timezone.now()
+            tasks.run_batch()
+            task.refresh_from_db()
+            self.assertEqual(task.attempts, 1)
+            self.assertEqual(task.last_error, 'ValueError: test error')
+            self.assertGreaterEqual(task.run_at, start + timedelta(seconds=10))
+            self.assertEqual(tasks.run_batch(), 0)
+
+            Task.objects.update(run_at=timezone.now())
+            tasks.run_batch()
+            task.refresh_from_db()
+            self.assertEqual(task.attempts, 2)
+            self.assertGreaterEqual(task.run_at, start + timedelta(seconds=20))
+            self.assertTrue(task.failed)
+
+            Task.objects.update(run_at=timezone.now())
+            self.assertEqual(tasks.run_batch(), 0)
+        self.assertEqual(handler.call_count, 2)
+
+    def test_failed_group_doesnt_stop_others(self):
+        tasks.enqueue('unknown_task')
+        handler = mock.Mock()
+        tasks.enqueue('test_task')
+        with mock.patch.dict(tasks.HANDLERS, {'test_task': handler}), self.assertLogs('hasker_app.tasks'):
+            self.assertEqual(tasks.run_batch(), 2)
+        handler.assert_called_once()
+        self.assertEqual(list(Task.objects.values_list('name', 'attempts')), [('unknown_task', 1)])
+
+    def test_failed_task_doesnt_fail_its_group(self):
+        for x in range(3):
+            tasks.enqueue('test_task', number=x)
+
+        def handler(payloads):
+            Task.objects.create(name='written_by_handler', payload='{}')
+            if {'number': 1} in payloads:
+                raise ValueError('test error')
+
+        handler = mock.Mock(side_effect=handler)
+        with mock.patch.dict(tasks.HANDLERS, {'test_task': handler}), self.assertLogs('hasker_app.tasks'):
+            self.assertEqual(tasks.run_batch(), 3)
+        self.assertEqual(handler.call_count, 4)
+        handler.assert_any_call([{'number': 0}])
+        handler.assert_any_call([{'number': 2}])
+        # writes of the failed group and the failed task are rolled back
+        self.assertEqual(Task.objects.filter(name='written_by_handler').count(), 2)
+        task = Task.objects.get(name='test_task')
+        self.assertEqual(task.payload, '{"number": 1}')
+        self.assertEqual((task.attempts, task.last_error), (1, 'ValueError: test error'))
+
+    def test_label_with_line_break(self):
+        c = Client()
+        c.login(**self.login_data)
+        Question.objects.filter(id=self.questions[0].id).update(label='first line\r\nsecond line')
+        self._answer(c, self.questions[0])
+        tasks.run_batch()
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(mail.outbox[0].subject, 'New answer to "first line second line"')
+
+    def test_question_without_label(self):
+        c = Client()
+        c.login(**self.login_data)
+        Question.objects.filter(id=self.questions[0].id).update(label=None)
+        self._answer(c, self.questions[0])
+        tasks.run_batch()
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(mail.outbox[0].subject, f'New answer to "question {self.questions[0].id}"')
+        self.assertIn('question without label', mail.outbox[0].body)
+
+    def test_command(self):
+        c = Client()
+        c.login(**self.login_data)
+        self._answer(c, self.questions[0])
+        out = StringIO()
+        call_command('run_tasks', '--once', stdout=out)
+        self.assertIn('Processed 1 tasks', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
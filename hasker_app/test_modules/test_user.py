@@ -1,16 +1,25 @@
 import base64
+import shutil
+import tempfile
 
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 
 # Create your tests here.
 from django.urls import reverse
 from django.utils.http import urlencode
 
+from hasker_app import thumbnails
 from hasker_app.models import UserReq
 
 
+# uploaded avatars and their thumbnails don't go to MEDIA_ROOT of project
+MEDIA_ROOT = tempfile.mkdtemp(prefix='hasker_test_media_')
+
+
+@override_settings(THUMBNAIL_BACKGROUND=False, MEDIA_ROOT=MEDIA_ROOT)
 class TestUser(TestCase):
     login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
     wrong_login_data = {'username': 'test_1', 'password': 'test_password1', 'next': '/'}
@@ -20,6 +29,11 @@ class TestUser(TestCase):
         "9TXL0Y4OHwAAAABJRU5ErkJggg=="
     )
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self) -> None:
         user = User.objects.create_user(
             username='test_1',
@@ -84,6 +98,29 @@ class TestUser(TestCase):
         user = UserReq.objects.first()
         self.assertNotEqual(user.avatar.url, '/static/hasker_app/default_avatar.jpg')
 
+    def test_user_edit_avatar_thumbnails(self):
+        c = Client()
+        c.post(reverse('login'), self.login_data)
+        image = SimpleUploadedFile("file.png", self.image_content, content_type="image/pnd")
+        c.post(reverse('edit_account'), {'avatar': image})
+        user = UserReq.objects.first()
+        self.assertEqual(len(user.avatar_hash), 64)
+        for size in thumbnails.SIZES:
+            for extension in thumbnails.FORMATS:
+                name = thumbnails.thumbnail_name(user.avatar_hash, size, extension)
+                self.assertTrue(default_storage.exists(name))
+        response = c.get(reverse('edit_account'))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, thumbnails.thumbnail_name(user.avatar_hash, 64, 'webp'))
+        self.assertContains(response, thumbnails.thumbnail_name(user.avatar_hash, 128, 'jpeg'))
+
+    def test_user_avatar_without_thumbnails(self):
+        c = Client()
+        c.post(reverse('login'), self.login_data)
+        response = c.get(reverse('edit_account'))
+        self.assertNotContains(response, '<picture>')
+        self.assertContains(response, '/static/hasker_app/default_avatar.jpg')
+
     def test_user_logout(self):
         c = Client()
         c.post(reverse('login'), self.login_data)
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hasker_app import thumbnails
+from hasker_app.models import UserReq
+
+
+class TestUserCache(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(
+            username='test_1',
+            first_name='test_first_name_1',
+            email='test_email@email.email',
+            password='test_password'
+        )
+        UserReq.objects.create(
+            user=user,
+            avatar='../static/hasker_app/default_avatar.jpg'
+        )
+        self.user = user
+
+    def _queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [x['sql'] for x in context.captured_queries]
+
+    def test_session_user_and_profile_cached(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('edit_account'))
+        queries = self._queries(c, reverse('edit_account'))
+        for table in ('django_session', 'auth_user', 'hasker_app_userreq'):
+            self.assertFalse([x for x in queries if f'FROM "{table}"' in x], table)
+
+    def test_profile_loaded_once(self):
+        c = Client()
+        # login saved last_login, so profile isn't cached yet; view and top panel share it
+        c.login(**self.login_data)
+        queries = self._queries(c, reverse('edit_account'))
+        self.assertEqual(len([x for x in queries if 'FROM "hasker_app_userreq"' in x]), 1)
+
+    def test_edit_user_invalidates(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('edit_account'))
+        c.post(reverse('edit_account'), {'email': 'new@email.email'})
+        self.assertContains(c.get(reverse('edit_account')), 'new@email.email')
+
+    def test_thumbnails_invalidate(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('edit_account'))
+        user_req = UserReq.objects.get(user=self.user)
+        thumbnails._save_hash(user_req.id, user_req.avatar.name, 'a' * 64)
+        self.assertContains(c.get(reverse('edit_account')), thumbnails.thumbnail_name('a' * 64, 64, 'webp'))
+
+    def test_password_change_logs_out(self):
+        c = Client()
+        c.login(**self.login_data)
+        self.assertEqual(c.get(reverse('edit_account')).status_code, 200)
+        self.user.set_password('new_password')
+        self.user.save()
+        self.assertNotEqual(c.get(reverse('edit_account')).status_code, 200)
+
+    def test_logout(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.get(reverse('logout'))
+        self.assertNotEqual(c.get(reverse('edit_account')).status_code, 200)
+
+    def test_cache_shared_by_processes(self):
+        # logout and invalidation in one server process must reach the others
+        self.assertNotIsInstance(caches[settings.SESSION_CACHE_ALIAS], LocMemCache)
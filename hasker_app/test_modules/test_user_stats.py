@@ -0,0 +1,141 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from hasker_app import user_stats
+from hasker_app.models import Answer, Question, UserReq, UserStats
+
+
+class TestUserStats(TestCase):
+    login_data = {'username': 'test_1', 'password': 'test_password', 'next': '/'}
+
+    def setUp(self) -> None:
+        self.users = []
+        for x in range(1, 3):
+            user = User.objects.create_user(
+                username=f'test_{x}',
+                first_name=f'test_first_name_{x}',
+                email='test_email@email.email',
+                password='test_password'
+            )
+            self.users.append(UserReq.objects.create(
+                user=user,
+                avatar='../static/hasker_app/default_avatar.jpg'
+            ))
+
+    def _stats(self, user_req):
+        return UserStats.objects.values('reputation', 'question_count', 'answer_count', 'accepted_count')\
+            .get(user=user_req)
+
+    def test_incremental_matches_rebuild(self):
+        c = Client()
+        c.login(**self.login_data)
+        c.post(reverse('ask_question'), {'label': 'label', 'text': 'text', 'tags': 'test_tag'})
+        question = Question.objects.get(label='label')
+        c.post(reverse('post_answer', args=[question.id]), {'text': 'own answer'})
+        other_question = Question.objects.create(label='other', text='text', user=self.users[1])
+        answer = Answer.objects.create(text='answer', question=question, user=self.users[1])
+        c.get(reverse('vote_up', args=['answer', answer.id]))
+        c.get(reverse('vote_down', args=['question', other_question.id]))
+
+        incremental = [self._stats(x) for x in self.users]
+        self.assertEqual(incremental[0]['question_count'], 1)
+        self.assertEqual(incremental[0]['answer_count'], 1)
+        self.assertEqual(incremental[1]['reputation'], user_stats.ANSWER_VOTE_REPUTATION -
+                         user_stats.QUESTION_VOTE_REPUTATION)
+
+        # rows of test answer and question created above without views
+        UserStats.objects.filter(user=self.users[1]).update(question_count=1, answer_count=1)
+        incremental[1] = self._stats(self.users[1])
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assertEqual([self._stats(x) for x in self.users], incremental)
+
+    def test_vote_change_and_cancel(self):
+        question = Question.objects.create(label='label', text='text', user=self.users[1])
+        c = Client()
+        c.login(**self.login_data)
+        c.post(reverse('vote_json', args=['question', question.id]), {'direction': 'up'})
+        self.assertEqual(self._stats(self.users[1])['reputation'], user_stats.QUESTION_VOTE_REPUTATION)
+        c.post(reverse('vote_json', args=['question', question.id]), {'direction': 'down'})
+        self.assertEqual(self._stats(self.users[1])['reputation'], 0)
+
+    def test_rebuild_accepted(self):
+        question = Question.objects.create(label='label', text='text', user=self.users[0])
+        Answer.objects.create(text='answer', question=question, user=self.users[1], confirmed=True)
+        user_stats.rebuild([x.id for x in self.users])
+        stats = self._stats(self.users[1])
+        self.assertEqual(stats['accepted_count'], 1)
+        self.assertEqual(stats['reputation'], user_stats.ACCEPTED_ANSWER_REPUTATION)
+
+    def test_accepted_incremental(self):
+        question = Question.objects.create(label='label', text='text', user=self.users[0])
+        answer = Answer.objects.create(text='answer', question=question, user=self.users[1])
+        Answer.objects.create(text='accepted', question=question, user=self.users[1], confirmed=True)
+        answer.confirmed = True
+        answer.save()
+        stats = self._stats(self.users[1])
+        self.assertEqual(stats['accepted_count'], 2)
+        self.assertEqual(stats['reputation'], 2 * user_stats.ACCEPTED_ANSWER_REPUTATION)
+
+        answer.confirmed = False
+        answer.save()
+        Answer.objects.get(text='accepted').delete()
+        incremental = self._stats(self.users[1])
+        self.assertEqual((incremental['accepted_count'], incremental['reputation']), (0, 0))
+        UserStats.objects.filter(user=self.users[1]).update(answer_count=1)
+        user_stats.rebuild([self.users[1].id])
+        self.assertEqual(self._stats(self.users[1]), dict(incremental, answer_count=1))
+
+    def test_user_with_accepted_answer_deleted(self):
+        question = Question.objects.create(label='label', text='text', user=self.users[0])
+        Answer.objects.create(text='answer', question=question, user=self.users[1], confirmed=True)
+        self.users[1].user.delete()
+        self.assertFalse(UserStats.objects.filter(user_id=self.users[1].id).exists())
+
+    def test_missing_row_created(self):
+        UserStats.objects.all().delete()
+        user_stats.change(self.users[0].id, question_count=1)
+        self.assertEqual(self._stats(self.users[0])['question_count'], 1)
+
+    def test_profile_page(self):
+        UserStats.objects.filter(user=self.users[1]).update(reputation=42, answer_count=7)
+        Question.objects.create(label='question_of_test_2', text='text', user=self.users[1])
+        response = Client().get(reverse('user_profile', args=['test_2']))
+        self.assertContains(response, '42')
+        self.assertContains(response, '7')
+        self.assertContains(response, 'question_of_test_2')
+        self.assertNotContains(response, reverse('edit_account'))
+
+    def test_profile_without_stats(self):
+        UserStats.objects.all().delete()
+        response = Client().get(reverse('user_profile', args=['test_1']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats'].reputation, 0)
+
+    def test_own_profile_links_edit(self):
+        c = Client()
+        c.login(**self.login_data)
+        self.assertContains(c.get(reverse('user_profile', args=['test_1'])), reverse('edit_account'))
+
+    def test_created_with_user(self):
+        self.assertEqual(self._stats(self.users[0]), {
+            'reputation': 0, 'question_count': 0, 'answer_count': 0, 'accepted_count': 0
+        })
+
+    def test_migration_matches_rebuild(self):
+        question = Question.objects.create(label='label', text='text', user=self.users[0], rating=3)
+        Answer.objects.create(text='answer', question=question, user=self.users[1], confirmed=True, rating=-1)
+        UserStats.objects.all().delete()
+        migration = import_module('hasker_app.migrations.0009_user_stats')
+        migration.fill_user_stats(django_apps, None)
+        migrated = [self._stats(x) for x in self.users]
+        user_stats.rebuild([x.id for x in self.users])
+        self.assertEqual([self._stats(x) for x in self.users], migrated)
+
+    def test_unknown_user(self):
+        self.assertEqual(Client().get(reverse('user_profile', args=['nobody'])).status_code, 404)
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+SIZES = (32, 64, 128)
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+THUMBNAILS_DIR = 'avatars'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_name(content_hash, size, extension):
+    return f'{THUMBNAILS_DIR}/{content_hash[:2]}/{content_hash}_{size}.{extension}'
+
+
+def make_thumbnails(source_path, media_root):
+    """Write square thumbnails of all sizes and formats, returns content hash of source.
+
+    Runs in worker process, so it uses only file paths and Pillow, not Django.
+    """
+    from PIL import Image, ImageOps
+
+    with open(source_path, 'rb') as source:
+        content_hash = hashlib.sha256(source.read()).hexdigest()
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size in SIZES:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            for extension, image_format in FORMATS.items():
+                path = os.path.join(media_root, thumbnail_name(content_hash, size, extension))
+                if os.path.exists(path):
+                    # same content was already processed
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                thumbnail.save(tmp_path, image_format, quality=85)
+                os.replace(tmp_path, path)
+    return content_hash
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2))
+        return _executor
+
+
+def _save_hash(user_req_id, avatar_name, content_hash):
+    from hasker_app import user_cache
+    from hasker_app.models import UserReq
+
+    # avatar could be changed again while thumbnails were made
+    if UserReq.objects.filter(id=user_req_id, avatar=avatar_name).update(avatar_hash=content_hash):
+        # update() sends no signals
+        user_cache.invalidate(UserReq.objects.values_list('user_id', flat=True).get(id=user_req_id))
+
+
+def schedule(user_req):
+    """Make thumbnails of just saved avatar out of request: in process pool,
+    or right away if THUMBNAIL_BACKGROUND is off"""
+    user_req_id, avatar_name, source_path = user_req.id, user_req.avatar.name, user_req.avatar.path
+    if not getattr(settings, 'THUMBNAIL_BACKGROUND', True):
+        _save_hash(user_req_id, avatar_name, make_thumbnails(source_path, settings.MEDIA_ROOT))
+        return
+
+    caller = threading.current_thread()
+
+    def done(future):
+        try:
+            _save_hash(user_req_id, avatar_name, future.result())
+        except Exception:
+            logger.exception('Can not make thumbnails for %s', avatar_name)
+        finally:
+            # callback of already finished future is called in request thread
+            if threading.current_thread() is not caller:
+                connection.close()
+
+    _get_executor().submit(make_thumbnails, source_path, settings.MEDIA_ROOT).add_done_callback(done)
@@ -1,17 +1,46 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
+from django.views.decorators.http import condition
 
-from . import views
+from . import feeds, views
+from .page_cache import cache_anonymous_page
 
 urlpatterns = [
-    path('', views.QuestionRateOrderedListView.as_view(), name='question_list'),
-    path('last', views.QuestionDateOrderedListView.as_view(), name='question_list_date_ordered'),
-    path('question/search', views.QuestionSearchListView.as_view(), name='question_search'),
-    path('question/<int:pk>/', views.QuestionView.as_view(), name='question_detail'),
+    path('', cache_anonymous_page(views.QuestionRateOrderedListView.as_view()), name='question_list'),
+    path(
+        'last',
+        cache_anonymous_page(views.QuestionDateOrderedListView.as_view()),
+        name='question_list_date_ordered'
+    ),
+    path(
+        'question/search',
+        cache_anonymous_page(views.QuestionSearchListView.as_view(), only_if=lambda x: 'search_tag' in x.GET),
+        name='question_search'
+    ),
+    path(
+        'question/<int:pk>/',
+        condition(etag_func=views.question_etag)(
+            cache_anonymous_page(views.QuestionView.as_view(), question_kwarg='pk')
+        ),
+        name='question_detail'
+    ),
+    path(
+        'question/<int:pk>/answers',
+        condition(etag_func=views.question_etag)(
+            cache_anonymous_page(views.question_answers, question_kwarg='pk')
+        ),
+        name='question_answers'
+    ),
     path('<str:obj_type>/<int:obj_id>/vote_down', views.vote_down, name='vote_down'),
     path('<str:obj_type>/<int:obj_id>/vote_up', views.vote_up, name='vote_up'),
+    path('<str:obj_type>/<int:obj_id>/vote', views.vote_json, name='vote_json'),
     path('question/<int:question_id>/answer', views.post_answer, name='post_answer'),
     path('question/ask', views.ask_question, name='ask_question'),
+    path('tags', cache_anonymous_page(views.TagListView.as_view()), name='tag_list'),
+    path('tags/autocomplete', views.tag_autocomplete, name='tag_autocomplete'),
+    path('user/<str:username>', views.UserProfileView.as_view(), name='user_profile'),
+    path('feeds/<str:feed_format>', feeds.question_feed, name='question_feed'),
+    path('feeds/tag/<str:tag>/<str:feed_format>', feeds.question_feed, name='tag_question_feed'),
 
     path(
         'account/logout',
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+
+from hasker_app.models import UserReq
+
+USER_KEY = 'hasker:user:{}'
+PROFILE_KEY = 'hasker:profile:{}'
+
+
+def _cache():
+    # the same cache as sessions, see SESSION_CACHE_ALIAS
+    return caches[getattr(settings, 'SESSION_CACHE_ALIAS', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'USER_CACHE_TTL', 300)
+
+
+def invalidate(user_id):
+    """Drop cached user and profile, on any change of them (see signals)"""
+    _cache().delete_many([USER_KEY.format(user_id), PROFILE_KEY.format(user_id)])
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend which keeps users of sessions in cache for USER_CACHE_TTL seconds"""
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        user = _cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                _cache().set(key, user, _ttl())
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+def get_profile(user):
+    """UserReq of authenticated user (None for anonymous) from cache, with user attached"""
+    if not user.is_authenticated:
+        return None
+    key = PROFILE_KEY.format(user.pk)
+    profile = _cache().get(key)
+    if profile is None:
+        profile = UserReq.objects.get(user_id=user.pk)
+        _cache().set(key, profile, _ttl())
+    # user.user_req is this profile from now on
+    profile.user = user
+    return profile
+
+
+class UserProfileMiddleware:
+    """request.user_req: profile of user, loaded on first use and at most once per request.
+    Should be after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_req = SimpleLazyObject(lambda: get_profile(request.user))
+        return self.get_response(request)
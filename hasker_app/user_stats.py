@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from hasker_app.models import Answer, Question, UserStats
+
+# reputation for every vote of question or answer of user, and for accepted answer
+QUESTION_VOTE_REPUTATION = 5
+ANSWER_VOTE_REPUTATION = 10
+ACCEPTED_ANSWER_REPUTATION = 15
+
+VOTE_REPUTATION = {
+    'question': QUESTION_VOTE_REPUTATION,
+    'answer': ANSWER_VOTE_REPUTATION,
+}
+
+
+def change(user_req_id, **deltas):
+    """Add deltas to counters of user, to be called in transaction of the change itself"""
+    if user_req_id is None:
+        # author was deleted
+        return
+    values = {name: F(name) + delta for name, delta in deltas.items()}
+    if not UserStats.objects.filter(user_id=user_req_id).update(**values):
+        # users of bulk import have no row until rebuild_user_stats
+        UserStats.objects.get_or_create(user_id=user_req_id)
+        UserStats.objects.filter(user_id=user_req_id).update(**values)
+
+
+def accepted_changed(user_req_id, sign):
+    """Answer of user was accepted (1) or is not any more (-1): unaccepted or deleted.
+
+    Missing row isn't created: user may be being deleted with the answer, and users
+    of bulk import get accepted answers counted by rebuild_user_stats
+    """
+    if user_req_id is None:
+        return
+    UserStats.objects.filter(user_id=user_req_id).update(
+        accepted_count=F('accepted_count') + sign,
+        reputation=F('reputation') + sign * ACCEPTED_ANSWER_REPUTATION,
+    )
+
+
+def compute(user_req_ids):
+    """Unsaved stats rows of users from stored question and answer ratings"""
+    questions = {
+        x['user_id']: x
+        for x in (
+            Question.objects
+            .filter(user_id__in=user_req_ids)
+            .values('user_id')
+            .annotate(total=Count('id'), rating=Sum('rating'))
+        )
+    }
+    answers = {
+        x['user_id']: x
+        for x in (
+            Answer.objects
+            .filter(user_id__in=user_req_ids)
+            .values('user_id')
+            .annotate(total=Count('id'), rating=Sum('rating'), accepted=Count('id', filter=Q(confirmed=True)))
+        )
+    }
+    empty = {'total': 0, 'rating': 0, 'accepted': 0}
+    result = []
+    for user_id in user_req_ids:
+        asked, answered = questions.get(user_id, empty), answers.get(user_id, empty)
+        result.append(UserStats(
+            user_id=user_id,
+            reputation=(
+                (asked['rating'] or 0) * QUESTION_VOTE_REPUTATION +
+                (answered['rating'] or 0) * ANSWER_VOTE_REPUTATION +
+                answered['accepted'] * ACCEPTED_ANSWER_REPUTATION
+            ),
+            question_count=asked['total'],
+            answer_count=answered['total'],
+            accepted_count=answered['accepted'],
+        ))
+    return result
+
+
+def rebuild(user_req_ids):
+    with transaction.atomic():
+        UserStats.objects.filter(user_id__in=user_req_ids).delete()
+        UserStats.objects.bulk_create(compute(user_req_ids))
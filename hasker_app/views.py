@@ -1,19 +1,28 @@
-from django.db.models import Sum, Q
-from django.db.models.functions import Coalesce
-from django.http import Http404, HttpResponseRedirect, HttpResponseForbidden
-from django.shortcuts import redirect, render
+import hashlib
+import math
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.http import Http404, HttpResponseRedirect, HttpResponseForbidden, HttpResponseBadRequest, JsonResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import urlencode
 from django.views import generic
+from django.views.decorators.http import require_POST
 
+from hasker_app import page_cache, search, side_panel, tasks, thumbnails, user_stats
+from hasker_app.concurrency import run_concurrently
+from hasker_app.db_router import replica_reads
 from hasker_app.form import UserForm, UserEditForm, QuestionForm
-from hasker_app.models import Question, UserRate, UserReq, Answer, Tag
-
-
-_side_question_queryset = (
-    Question
-    .objects
-    .annotate(rate=Coalesce(Sum('rates__rate'), 0))
-    .order_by('-rate', '-created_date')[0:10]
-)
+from hasker_app.instrumentation import query_budget
+from hasker_app.models import Question, UserRate, UserReq, UserStats, Answer, Tag
+from hasker_app.pagination import CachedCountPaginator, CursorPaginator, InvalidCursor
+from hasker_app.tag_index import tag_index
 
 
 def for_authenticated_users(func):
@@ -25,43 +34,179 @@ def for_authenticated_users(func):
     return wrapper
 
 
+def _votes_map(rates):
+    votes = {}
+    for question_id, answer_id, rate in rates.values_list('question_id', 'answer_id', 'rate'):
+        if question_id is not None:
+            votes[('question', question_id)] = rate
+        else:
+            votes[('answer', answer_id)] = rate
+    return votes
+
+
+def load_user_votes(user, questions=(), answers=()):
+    """Votes of user for given objects in one query as {(type, id): rate} for vote tag"""
+    if not user.is_authenticated:
+        return {}
+    question_ids = [x.id for x in questions]
+    answer_ids = [x.id for x in answers]
+    if not question_ids and not answer_ids:
+        return {}
+    return _votes_map(
+        UserRate
+        .objects
+        .filter(user__user=user)
+        .filter(Q(question_id__in=question_ids) | Q(answer_id__in=answer_ids))
+    )
+
+
+def load_question_page_votes(user, question_id):
+    """Votes of user for question and all its answers, without loading answers first"""
+    if not user.is_authenticated:
+        return {}
+    return _votes_map(
+        UserRate
+        .objects
+        .filter(user__user=user)
+        .filter(Q(question_id=question_id) | Q(answer__question_id=question_id))
+    )
+
+
 class SidePanelView(generic.ListView):
+    loaded = None
+
+    def load_concurrently(self):
+        """Independent queries of page as {context name: callable}, see concurrency.run_concurrently"""
+        return {'side_questions': side_panel.get_side_questions}
+
+    def get(self, request, *args, **kwargs):
+        # lazy user is resolved here, not in several worker threads at once
+        request.user.is_authenticated
+        self.loaded = run_concurrently(self.load_concurrently())
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context['side_questions'] = _side_question_queryset.all()
+        context['side_questions'] = self.loaded['side_questions']
         return context
 
 
+def question_etag(request, pk):
+    """Validator of question page: version of question (changed by answers and votes,
+    see page_cache.bump) and, for users, what top panel shows of them and CSRF token of
+    answer form. No queries for anonymous requests besides cache lookup of version.
+    """
+    parts = [page_cache.question_version(pk)]
+    if request.user.is_authenticated:
+        user_req = request.user_req
+        parts += [request.user.pk, request.user.username, user_req.avatar.name, user_req.avatar_hash]
+        # page kept after login or token rotation would post the form with stale token;
+        # get_token makes the token the page will have if there is no cookie yet
+        get_token(request)
+        parts.append(request.META['CSRF_COOKIE'])
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def load_answers_page(request, question_id):
+    """Page of answers of ?cursor=, accepted and top rated first. Pages are keyset
+    ones (see CursorPaginator), so late pages of long threads cost the same.
+    """
+    paginator = CursorPaginator(
+        Answer.objects.select_related('user__user').filter(question=question_id),
+        getattr(settings, 'ANSWERS_PER_PAGE', 30),
+        ['-confirmed', '-rating', '-created_date']
+    )
+    try:
+        return paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+
+
 class QuestionView(SidePanelView):
-    queryset = Answer.objects.annotate(rate=Coalesce(Sum('rates__rate'), 0))
+    queryset = Answer.objects.all()
     template_name = 'hasker_app/question.html'
+    # doesn't depend on number of answers, see test_query_budget; ETag costs version lookup.
+    # Empty caches: side panel, page versions, session, user and profile are filled
+    query_budget = 8
+    cold_query_budget = 26
+    replica_reads = True
+
+    def get_answers(self):
+        return load_answers_page(self.request, self.kwargs['pk'])
+
+    def load_concurrently(self):
+        tasks = super().load_concurrently()
+        tasks.update({
+            'question': lambda: get_object_or_404(Question, id=self.kwargs['pk']),
+            'answers': self.get_answers,
+            'user_votes': lambda: load_question_page_votes(self.request.user, self.kwargs['pk']),
+        })
+        return tasks
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # ETag is revalidated on every visit, page of user is not for shared caches
+        if request.user.is_authenticated:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
 
     def get_queryset(self):
-        self.queryset = (
-            Answer
-            .objects
-            .annotate(rate=Coalesce(Sum('rates__rate'), 0))
-            .filter(question=self.kwargs['pk'])
-            .order_by('-confirmed', '-rate', '-created_date')
-        )
-        return super().get_queryset()
+        return self.loaded['answers'].object_list
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context['question'] = (
-            Question
-            .objects
-            .annotate(rate=Coalesce(Sum('rates__rate'), 0))
-            .get(id=self.kwargs['pk'])
-        )
+        context['question'] = self.loaded['question']
+        context['answers_page'] = self.loaded['answers']
+        context['user_votes'] = self.loaded['user_votes']
         return context
 
 
 class QuestionListView(SidePanelView):
-    queryset = Question.objects.annotate(rate=Coalesce(Sum('rates__rate'), 0))
+    # only columns shown in question_list.html, no per-row queries
+    queryset = (
+        Question
+        .objects
+        .select_related('user__user')
+        .prefetch_related('tags')
+        .only('label', 'rating', 'answer_count', 'created_date', 'user__user__username')
+    )
     paginate_by = 10
+    paginator_class = CachedCountPaginator
     template_name = 'hasker_app/question_list.html'
+    # side panel cache, cached count, page, tags (see test_query_budget);
+    # session, user and profile are cached (see hasker_app.user_cache)
+    query_budget = 4
+    cold_query_budget = 29
+    replica_reads = True
     header_type = None
+    # ?cursor= keyset pagination, ?page= still works with OFFSET
+    cursor_pagination = True
+
+    def load_concurrently(self):
+        tasks = super().load_concurrently()
+        tasks['pagination'] = lambda: self._paginate(self.get_queryset(), self.get_paginate_by(None))
+        return tasks
+
+    def paginate_queryset(self, queryset, page_size):
+        # page is loaded by load_concurrently together with side panel
+        return self.loaded['pagination']
+
+    def _paginate(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = self._paginate_page(queryset, page_size)
+        object_list = page.object_list = list(object_list)
+        return paginator, page, object_list, is_paginated
+
+    def _paginate_page(self, queryset, page_size):
+        if not self.cursor_pagination or self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.get_ordering())
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return paginator, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
@@ -71,12 +216,12 @@ class QuestionListView(SidePanelView):
 
 
 class QuestionDateOrderedListView(QuestionListView):
-    ordering = ['-created_date', '-rate']
+    ordering = ['-created_date', '-rating']
     header_type = 'date'
 
 
 class QuestionRateOrderedListView(QuestionListView):
-    ordering = ['-rate', '-created_date']
+    ordering = ['-rating', '-created_date']
     header_type = 'rate'
 
 
@@ -89,21 +234,103 @@ class QuestionSearchListView(QuestionRateOrderedListView):
                 super()
                 .queryset
                 .filter(
-                    tags__name=self.request.GET['search_tag']
+                    tags__name=Tag.normalize_name(self.request.GET['search_tag'])
                 )
             )
         else:
-            self.queryset = (
-                super()
-                .queryset
-                .filter(
-                    Q(label__contains=self.request.GET['search_str']) |
-                    Q(text__contains=self.request.GET['search_str'])
-                )
-            )
+            self.queryset = search.get_backend().search(super().queryset, self.request.GET['search_str'])
         return super().get_queryset()
 
+    def get_ordering(self):
+        if 'search_tag' in self.request.GET.keys():
+            return super().get_ordering()
+        return ['-search_rank'] + super().get_ordering()
+
+
+class TagListView(SidePanelView):
+    """Tag directory by popularity, from stored Tag.question_count"""
+    queryset = Tag.objects.filter(question_count__gt=0)
+    ordering = ['-question_count', 'name']
+    paginate_by = 100
+    paginator_class = CachedCountPaginator
+    template_name = 'hasker_app/tag_list.html'
+    # side panel cache, cached count, page
+    query_budget = 3
+    cold_query_budget = 28
+    replica_reads = True
+    cloud_sizes = 5
+
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        tags = context['object_list'] = list(context['object_list'])
+        top = max((x.question_count for x in tags), default=1)
+        for tag in tags:
+            # font size step by logarithm of count, relative to the most popular tag on page
+            tag.cloud_size = 1 + round((self.cloud_sizes - 1) * math.log1p(tag.question_count) / math.log1p(top))
+        return context
+
+
+class UserProfileView(SidePanelView):
+    """Reputation and counters of user from UserStats row, and newest questions of user"""
+    template_name = 'hasker_app/user_profile.html'
+    # side panel cache, user with profile and stats, questions
+    query_budget = 3
+    cold_query_budget = 12
+    replica_reads = True
+    recent_questions = 10
+
+    def load_concurrently(self):
+        tasks = super().load_concurrently()
+        username = self.kwargs['username']
+        tasks.update({
+            'profile': lambda: get_object_or_404(
+                UserReq.objects.select_related('user', 'stats'),
+                user__username=username
+            ),
+            'questions': lambda: list(
+                Question
+                .objects
+                .filter(user__user__username=username)
+                .only('label', 'rating', 'answer_count', 'created_date')
+                .order_by('-created_date')[:self.recent_questions]
+            ),
+        })
+        return tasks
+
+    def get_queryset(self):
+        return self.loaded['questions']
+
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        profile = context['profile'] = self.loaded['profile']
+        # users of bulk import have no stats row until rebuild_user_stats
+        context['stats'] = getattr(profile, 'stats', None) or UserStats(user=profile)
+        return context
+
+
+# page of answers, user votes for them, version of question for ETag
+@replica_reads
+@query_budget(3, cold=15)
+def question_answers(request, pk):
+    """Page of answers after question page, for loading them on scroll: JSON with
+    rendered rows and URL of the next page (null on the last one)
+    """
+    page = load_answers_page(request, pk)
+    html = render_to_string(
+        'hasker_app/answer_rows.html',
+        {
+            'object_list': page.object_list,
+            'user_votes': load_user_votes(request.user, answers=page.object_list),
+        },
+        request=request
+    )
+    next_url = None
+    if page.has_next():
+        next_url = reverse('question_answers', args=[pk]) + '?' + urlencode({'cursor': page.next_cursor})
+    return JsonResponse({'html': html, 'next': next_url})
+
 
+@query_budget(18, cold=21)
 @for_authenticated_users
 def post_answer(request, question_id):
     if Question.objects.filter(id=question_id).count() == 0:
@@ -111,46 +338,94 @@ def post_answer(request, question_id):
     answer = Answer(
         text=request.POST['text'],
         question_id=question_id,
-        user=UserReq.objects.get(user=request.user)
+        user=request.user_req
     )
-    answer.save()
+    with transaction.atomic():
+        answer.save()
+        Question.objects.filter(id=question_id).update(answer_count=F('answer_count') + 1)
+        user_stats.change(answer.user_id, answer_count=1)
+        # mail is sent by run_tasks worker, only if answer is committed
+        tasks.enqueue('notify_answers', answer_id=answer.id)
+    page_cache.bump(question_id)
     return redirect('question_detail', pk=question_id)
 
 
-def vote_change(user, obj_type, obj_id, value):
+VoteResult = namedtuple('VoteResult', ['question_id', 'rating', 'vote'])
+
+
+def _apply_vote(user_req, obj_type, obj_id, value):
+    """Change vote of user with conditional UPDATE or INSERT, returns change of object rating"""
+    rates = UserRate.objects.filter(user=user_req, **{f'{obj_type}_id': obj_id})
+    # vote is -1, 0 or 1: it can't go further in the same direction
+    if rates.exclude(rate=value).update(rate=F('rate') + value):
+        return value
+    try:
+        with transaction.atomic():
+            UserRate.objects.create(user=user_req, rate=value, **{f'{obj_type}_id': obj_id})
+        return value
+    except IntegrityError:
+        # vote already exists with the same sign, or was just created by concurrent request
+        return value if rates.exclude(rate=value).update(rate=F('rate') + value) else 0
+
+
+def vote_change(user_req, obj_type, obj_id, value):
     if obj_type == 'question':
-        question_id = obj_id
+        model = Question
     elif obj_type == 'answer':
-        question_id = Answer.objects.get(pk=obj_id).question_id
+        model = Answer
     else:
         raise Http404('No type found')
-
-    rate_list = UserRate.objects.filter(user__user=user, **{f'{obj_type}__id': obj_id}).all()
-    if rate_list:
-        rate = rate_list[0]
-        # check if current rate and desirable has different sign
-        if rate.rate * value > 0:
-            return question_id
-        rate.rate += value
-    else:
-        user_req = UserReq.objects.get(user=user)
-        rate = UserRate(user=user_req, rate=value, **{f'{obj_type}_id': obj_id})
-    rate.save()
-    return question_id
+    obj = get_object_or_404(model.objects.defer('text'), pk=obj_id)
+    question_id = obj.question_id if obj_type == 'answer' else obj.id
+
+    with transaction.atomic():
+        delta = _apply_vote(user_req, obj_type, obj_id, value)
+        if delta:
+            model.objects.filter(pk=obj_id).update(rating=F('rating') + delta)
+            user_stats.change(obj.user_id, reputation=delta * user_stats.VOTE_REPUTATION[obj_type])
+        rating = model.objects.values_list('rating', flat=True).get(pk=obj_id)
+        vote = (
+            UserRate
+            .objects
+            .filter(user=user_req, **{f'{obj_type}_id': obj_id})
+            .values_list('rate', flat=True)
+            .first()
+        )
+    if delta:
+        # answer rating is shown only on question page
+        page_cache.bump(question_id, global_version=(obj_type == 'question'))
+    if delta and obj_type == 'question':
+        side_panel.question_changed(obj.id, rating, obj.created_date)
+    return VoteResult(question_id, rating, vote or 0)
 
 
+# vote, rating and reputation, then page cache versions: every database cache write takes 5 queries
+@query_budget(20, cold=25)
 @for_authenticated_users
 def vote_up(request, obj_type, obj_id):
-    question_id = vote_change(request.user, obj_type, obj_id, 1)
-    return redirect('question_detail', pk=question_id)
+    result = vote_change(request.user_req, obj_type, obj_id, 1)
+    return redirect('question_detail', pk=result.question_id)
 
 
+@query_budget(20, cold=25)
 @for_authenticated_users
 def vote_down(request, obj_type, obj_id):
-    question_id = vote_change(request.user, obj_type, obj_id, -1)
-    return redirect('question_detail', pk=question_id)
+    result = vote_change(request.user_req, obj_type, obj_id, -1)
+    return redirect('question_detail', pk=result.question_id)
 
 
+@query_budget(20, cold=25)
+@require_POST
+@for_authenticated_users
+def vote_json(request, obj_type, obj_id):
+    directions = {'up': 1, 'down': -1}
+    if request.POST.get('direction') not in directions:
+        return HttpResponseBadRequest('direction must be up or down')
+    result = vote_change(request.user_req, obj_type, obj_id, directions[request.POST['direction']])
+    return JsonResponse({'rating': result.rating, 'vote': result.vote})
+
+
+@query_budget(8, cold=10)
 def create_user(request):
     if request.method == 'POST':
         form = UserForm(request.POST, request.FILES)
@@ -160,6 +435,8 @@ def create_user(request):
             if 'avatar' in request.FILES.keys():
                 user_req.avatar = request.FILES['avatar']
             user_req.save()
+            if 'avatar' in request.FILES.keys():
+                thumbnails.schedule(user_req)
             return HttpResponseRedirect('/account/login')
         else:
             pass
@@ -171,44 +448,63 @@ def create_user(request):
         'hasker_app/register.html',
         {
             'form': form,
-            'side_questions': _side_question_queryset.all()
+            'side_questions': side_panel.get_side_questions()
         }
     )
 
 
+# avatar thumbnails made in request (THUMBNAIL_BACKGROUND off) save their hash
+@query_budget(5, cold=13)
 @for_authenticated_users
 def edit_user(request):
     if request.method == 'POST':
-        user_req = UserReq.objects.get(user__id=request.user.id)
+        user_req = request.user_req
         form = UserEditForm(request.POST, request.FILES)
         if form.is_valid():
             if 'avatar' in request.FILES.keys():
                 user_req.avatar = request.FILES['avatar']
+                # original is shown until thumbnails of new avatar are ready
+                user_req.avatar_hash = ''
             user_req.user.email = form.cleaned_data['email']
             user_req.user.save()
             user_req.save()
+            if 'avatar' in request.FILES.keys():
+                thumbnails.schedule(user_req)
     else:
-        user_req = UserReq.objects.get(user=request.user)
+        user_req = request.user_req
     form = UserEditForm(initial={'avatar': user_req.avatar, 'email': user_req.user.email})
     return render(
         request,
         'hasker_app/account_edit.html',
         {
             'form': form,
-            'side_questions': _side_question_queryset.all()
+            'side_questions': side_panel.get_side_questions()
         }
     )
 
 
+@query_budget(2)
+def tag_autocomplete(request):
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 50)
+    except ValueError:
+        return HttpResponseBadRequest('limit must be a number')
+    return JsonResponse({'tags': tag_index.search(request.GET.get('q', ''), limit)})
+
+
+# question with tags and author stats in one transaction, then page cache version
+@query_budget(17, cold=22)
 @for_authenticated_users
 def ask_question(request):
-    tags = Tag.objects.all()
-    tags_list = [x.name for x in tags]
     if request.method == 'POST':
         form = QuestionForm(request.POST)
         if form.is_valid():
-            form.instance.user = request.user.user_req
-            form.save()
+            form.instance.user = request.user_req
+            with transaction.atomic():
+                form.save()
+                user_stats.change(form.instance.user_id, question_count=1)
+            page_cache.bump()
+            side_panel.question_changed(form.instance.id, form.instance.rating, form.instance.created_date)
             return HttpResponseRedirect(f'/question/{form.instance.id}')
     else:
         form = QuestionForm()
@@ -217,7 +513,6 @@ def ask_question(request):
         'hasker_app/ask_question.html',
         {
             'form': form,
-            'tags_list': tags_list,
-            'side_questions': _side_question_queryset.all()
+            'side_questions': side_panel.get_side_questions()
         }
     )